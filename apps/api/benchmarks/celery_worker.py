@@ -0,0 +1,16 @@
+# apps/api/benchmarks/celery_worker.py
+"""Celery entrypoint for `run.py --pipeline-mode live`.
+
+Started as `celery -A apps.api.benchmarks.celery_worker worker`; installs the
+fake LLM and filesystem storage before the pool forks so every child uses them.
+"""
+
+import os
+
+from ..core.celery_app import celery_app  # noqa: F401 - `celery -A` target
+from .fakes import install_fakes
+
+install_fakes(
+    os.environ["BENCH_STORAGE_DIR"],
+    float(os.getenv("BENCH_LLM_LATENCY_MS", "0")),
+)
@@ -0,0 +1,22 @@
+# apps/api/benchmarks/db_worker.py
+"""Postgres-backed worker entrypoint for `run.py --pipeline-mode db`.
+
+Started as `python -m apps.api.benchmarks.db_worker`; same fakes as
+celery_worker.py, concurrency from WORKER_CONCURRENCY.
+"""
+
+import os
+
+from .fakes import install_fakes
+
+install_fakes(
+    os.environ["BENCH_STORAGE_DIR"],
+    float(os.getenv("BENCH_LLM_LATENCY_MS", "0")),
+)
+
+from ..worker import JobRunner  # noqa: E402
+
+if __name__ == "__main__":
+    runner = JobRunner()
+    runner.start()
+    runner.listen()
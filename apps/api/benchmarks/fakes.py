@@ -0,0 +1,134 @@
+# apps/api/benchmarks/fakes.py
+"""Offline stand-ins for Gemini and Supabase Storage used by the benchmarks."""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+
+class FakeGeminiModels:
+    """Mimics `client.models.generate_content` with a fixed latency."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def generate_content(self, model, contents, config):
+        from ..core.llm import StudyMaterial
+
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        digest = hashlib.sha1(contents.encode("utf-8")).hexdigest()[:8]
+        if config.response_schema is StudyMaterial:
+            payload = {
+                "flashcards": [
+                    {"question": f"Q{i} {digest}", "answer": "A"} for i in range(10)
+                ],
+                "quiz": [
+                    {
+                        "question": f"Q{i} {digest}",
+                        "options": ["a", "b", "c", "d"],
+                        "answer_index": i % 4,
+                        "explanation": "because",
+                    }
+                    for i in range(6)
+                ],
+            }
+        else:
+            payload = {
+                "summary": f"Summary {digest}: " + contents[-200:],
+                "claims": [f"claim {i} {digest}" for i in range(4)],
+            }
+        return SimpleNamespace(
+            text=json.dumps(payload),
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=len(contents) // 4,
+                candidates_token_count=len(json.dumps(payload)) // 4,
+            ),
+        )
+
+
+class FakeGeminiClient:
+    def __init__(self, latency_ms: float = 0.0):
+        self.models = FakeGeminiModels(latency_ms)
+
+
+class _FakeBucket:
+    def __init__(self, root: str, name: str):
+        self.root = os.path.join(root, name)
+        self.name = name
+
+    def _path(self, path: str) -> str:
+        return os.path.join(self.root, path)
+
+    def upload(self, path, file, file_options=None):
+        full = self._path(path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as fh:
+            fh.write(file)
+
+    def get_public_url(self, path):
+        return f"http://fake-storage/storage/v1/object/public/{self.name}/{path}"
+
+    def download(self, path):
+        with open(self._path(path), "rb") as fh:
+            return fh.read()
+
+    def list(self, path, options=None):
+        options = options or {}
+        offset = options.get("offset", 0)
+        limit = options.get("limit", 100)
+        try:
+            names = sorted(os.listdir(self._path(path)))
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names[offset : offset + limit]:
+            full = os.path.join(self._path(path), name)
+            if os.path.isdir(full):
+                # Supabase reports folders with a null id.
+                entries.append({"name": name, "id": None})
+                continue
+            created = datetime.fromtimestamp(os.path.getmtime(full), timezone.utc)
+            entries.append(
+                {"name": name, "id": name, "created_at": created.isoformat()}
+            )
+        return entries
+
+    def remove(self, paths):
+        for path in paths:
+            try:
+                os.remove(self._path(path))
+            except FileNotFoundError:
+                pass
+
+
+class FakeStorage:
+    """Filesystem-backed Supabase Storage, shareable across processes."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def from_(self, bucket: str):
+        return _FakeBucket(self.root, bucket)
+
+
+class FakeSupabase:
+    def __init__(self, root: str):
+        self.storage = FakeStorage(root)
+
+
+def install_fakes(storage_dir: str, llm_latency_ms: float = 0.0):
+    """Swap Gemini, embeddings and storage for local stand-ins in this process."""
+    os.environ["EMBEDDING_PROVIDER"] = "fake"
+
+    from ..core import llm
+    from ..deps.supabase import set_supabase_client
+
+    llm.client = FakeGeminiClient(llm_latency_ms)
+    set_supabase_client(FakeSupabase(storage_dir))
+    return llm.client
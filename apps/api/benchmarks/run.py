@@ -0,0 +1,483 @@
+# apps/api/benchmarks/run.py
+"""Reproducible offline benchmarks for the ingest-to-summary pipeline.
+
+Examples (from the repo root):
+
+    # PDF + summarization stages only, no services needed
+    python -m apps.api.benchmarks.run --suites stages --output results.json
+
+    # Save a baseline, then fail (exit 1) on >25% median regressions
+    python -m apps.api.benchmarks.run --save-baseline baseline.json
+    python -m apps.api.benchmarks.run --baseline baseline.json --tolerance 0.25
+
+    # Full API -> Celery -> DB path with a real worker on local Redis
+    python -m apps.api.benchmarks.run --suites pipeline --pipeline-mode live
+
+    # Same path through the Postgres-backed worker (worker.py), no Redis
+    python -m apps.api.benchmarks.run --suites pipeline --pipeline-mode db
+
+    # Import time and time-to-first-request of the API and worker entrypoints
+    python -m apps.api.benchmarks.run --suites startup --no-db
+
+Gemini and Supabase Storage are always replaced by local fakes (see fakes.py).
+DB-backed suites use DATABASE_URL and write rows, so point it at a scratch DB.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("SQL_ECHO", "false")
+os.environ["EMBEDDING_PROVIDER"] = "fake"
+
+from .synthetic import SIZES, make_pdf  # noqa: E402
+
+Results = Dict[str, Dict[str, float]]
+
+
+def _stats(samples_ms: List[float], **extra: float) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "runs": len(ordered),
+        "median_ms": statistics.median(ordered),
+        "p95_ms": ordered[p95_index],
+        "min_ms": ordered[0],
+        "mean_ms": statistics.fmean(ordered),
+        **extra,
+    }
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int,
+    warmup: int = 1,
+    setup: Optional[Callable[[], None]] = None,
+) -> List[float]:
+    """Run fn `warmup + repeat` times and return the timed samples in ms."""
+    samples = []
+    for i in range(warmup + repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def _db_available() -> bool:
+    from sqlalchemy import text
+
+    from ..deps.db import engine
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception as exc:
+        print(f"  database unavailable, skipping DB suites: {exc}", file=sys.stderr)
+        return False
+
+
+def _create_job(source_url: str = "benchmark", owner_user_id: str = "benchmark") -> str:
+    from sqlmodel import Session
+
+    from ..deps.db import engine
+    from ..models.job_model import Job, JobStatus, SourceType
+
+    with Session(engine) as session:
+        job = Job(
+            owner_user_id=owner_user_id,
+            source_type=SourceType.pdf,
+            source_url=source_url,
+            status=JobStatus.processing,
+        )
+        session.add(job)
+        session.commit()
+        return str(job.id)
+
+
+def run_stage_suite(args, results: Results) -> None:
+    from pypdf import PdfReader
+
+    from ..core.llm import generate_section_summary, generate_study_material
+    from ..tasks import reduce_analyses
+    from ..utils.pdf_parser import clean_text, compress_pdf, extract_sections_from_pdf
+
+    for size, pages in SIZES.items():
+        print(f"- stages/{size} ({pages} pages)")
+        raw = make_pdf(pages, seed=args.seed)
+        compressed = compress_pdf(raw)
+
+        samples = measure(lambda: compress_pdf(raw), args.repeat)
+        results[f"compress/{size}"] = _stats(
+            samples, pages_per_sec=pages / (statistics.median(samples) / 1000)
+        )
+
+        def extract():
+            return [p.extract_text() for p in PdfReader(io.BytesIO(compressed)).pages]
+
+        samples = measure(extract, args.repeat)
+        results[f"extract/{size}"] = _stats(
+            samples, pages_per_sec=pages / (statistics.median(samples) / 1000)
+        )
+
+        page_texts = extract()
+        results[f"segment/{size}"] = _stats(
+            measure(lambda: [clean_text(t) for t in page_texts], args.repeat)
+        )
+        results[f"parse/{size}"] = _stats(
+            measure(lambda: extract_sections_from_pdf(compressed), args.repeat)
+        )
+
+        sections = extract_sections_from_pdf(compressed)
+        results[f"summarize_map/{size}"] = _stats(
+            measure(
+                lambda: [generate_section_summary(s["content"]) for s in sections],
+                args.repeat,
+            )
+        )
+        analyses = [generate_section_summary(s["content"])[0] for s in sections]
+
+        def reduce():
+            generate_study_material(reduce_analyses(list(analyses)))
+
+        results[f"summarize_reduce/{size}"] = _stats(measure(reduce, args.repeat))
+
+        if args.db:
+            from ..tasks import save_sections
+
+            job_id = _create_job()
+            results[f"persist/{size}"] = _stats(
+                measure(
+                    lambda: save_sections(job_id, sections),
+                    args.repeat,
+                    setup=lambda: _delete_sections(job_id),
+                )
+            )
+
+
+def _delete_sections(job_id: str) -> None:
+    from sqlalchemy import delete
+    from sqlmodel import Session
+
+    from ..deps.db import engine
+    from ..models.section_model import Section
+
+    with Session(engine) as session:
+        session.exec(delete(Section).where(Section.job_id == job_id))
+        session.commit()
+
+
+def _wait_for_jobs(job_ids: List[str], timeout_s: float) -> Dict[str, str]:
+    from sqlmodel import Session, select
+
+    from ..deps.db import engine
+    from ..models.job_model import Job, JobStatus
+
+    deadline = time.monotonic() + timeout_s
+    while True:
+        with Session(engine) as session:
+            statuses = {
+                str(j.id): j.status
+                for j in session.exec(select(Job).where(Job.id.in_(job_ids))).all()
+            }
+        pending = [
+            s for s in statuses.values() if s not in (JobStatus.done, JobStatus.error)
+        ]
+        if not pending or time.monotonic() > deadline:
+            return {k: v.value for k, v in statuses.items()}
+        time.sleep(0.05)
+
+
+def run_pipeline_suite(args, results: Results, storage_dir: str) -> None:
+    """POST PDFs through the API and wait until the jobs are done in the DB."""
+    from fastapi.testclient import TestClient
+
+    from ..core import job_queue
+    from ..core.celery_app import celery_app
+    from ..main import app
+
+    worker = None
+    env = dict(
+        os.environ,
+        BENCH_STORAGE_DIR=storage_dir,
+        BENCH_LLM_LATENCY_MS=str(args.llm_latency_ms),
+    )
+    if args.pipeline_mode == "eager":
+        # The API enqueues tasks by name; registering them here makes those
+        # signatures run in-process instead of going to the broker.
+        from .. import tasks  # noqa: F401
+
+        celery_app.conf.task_always_eager = True
+    elif args.pipeline_mode == "live":
+        worker = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "celery",
+                "-A",
+                "apps.api.benchmarks.celery_worker",
+                "worker",
+                "--loglevel=warning",
+                f"--concurrency={args.worker_concurrency}",
+            ],
+            env=env,
+        )
+        time.sleep(args.worker_startup_s)
+    else:
+        job_queue.JOB_BACKEND = "db"
+        env["WORKER_CONCURRENCY"] = str(args.worker_concurrency)
+        per_job = int(env.setdefault("WORKER_SECTION_CONCURRENCY", "4"))
+        env.setdefault("DB_POOL_SIZE", str(args.worker_concurrency * per_job + 3))
+        worker = subprocess.Popen(
+            [sys.executable, "-m", "apps.api.benchmarks.db_worker"], env=env
+        )
+        time.sleep(args.worker_startup_s)
+
+    try:
+        with TestClient(app) as client:
+            for size, pages in SIZES.items():
+                print(f"- pipeline/{size} ({args.pipeline_jobs} jobs)")
+                pdf = make_pdf(pages, seed=args.seed)
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    job_ids = []
+                    for _ in range(args.pipeline_jobs):
+                        response = client.post(
+                            "/v1/jobs/upload",
+                            files={"file": ("bench.pdf", pdf, "application/pdf")},
+                        )
+                        response.raise_for_status()
+                        job_ids.append(response.json()["job_id"])
+                    statuses = _wait_for_jobs(job_ids, args.pipeline_timeout_s)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    failed = [s for s in statuses.values() if s != "done"]
+                    if failed:
+                        raise RuntimeError(f"pipeline/{size}: jobs ended as {failed}")
+                median_s = statistics.median(samples) / 1000
+                results[f"pipeline_{args.pipeline_mode}/{size}"] = _stats(
+                    samples, jobs_per_sec=args.pipeline_jobs / median_s
+                )
+    finally:
+        if worker:
+            worker.terminate()
+            worker.wait(timeout=30)
+
+
+# Share of seeded sections owned by the user in the owner-filtered search case.
+SEARCH_OWNER_SHARE = 100
+
+
+def run_search_suite(args, results: Results) -> None:
+    """Seed `--search-rows` random vectors and time /v1/search top-k.
+
+    One section in SEARCH_OWNER_SHARE belongs to a separate owner, whose
+    owner-filtered searches are timed too; `mean_hits` shows whether they
+    still fill the page.
+    """
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+
+    from ..core.embeddings import EMBEDDING_DIM
+    from ..deps.db import engine
+    from ..main import app
+
+    job_id = _create_job()
+    owner_job_id = _create_job(owner_user_id="benchmark-owner")
+    print(f"- search: seeding {args.search_rows} sections")
+    batch = 10_000
+    with engine.begin() as conn:
+        for start in range(0, args.search_rows, batch):
+            conn.execute(
+                text(
+                    'INSERT INTO section (id, job_id, title, "order", content, '
+                    "embeddings, created_at, updated_at) "
+                    "SELECT gen_random_uuid(), "
+                    "CAST(CASE WHEN g % :share = 0 THEN :owner_job_id ELSE :job_id END AS uuid), "
+                    "'Page ' || g, g, "
+                    "'synthetic section ' || g, "
+                    # Referencing g keeps the subquery per-row (one vector each).
+                    f"ARRAY(SELECT random() + 0 * g FROM generate_series(1, {EMBEDDING_DIM}))::vector, "
+                    "now(), now() FROM generate_series(:lo, :hi) AS g"
+                ),
+                {
+                    "job_id": job_id,
+                    "owner_job_id": owner_job_id,
+                    "share": SEARCH_OWNER_SHARE,
+                    "lo": start,
+                    "hi": min(start + batch, args.search_rows) - 1,
+                },
+            )
+        conn.execute(text("ANALYZE section"))
+
+    queries = iter(f"query {i} attention latency" for i in range(10**9))
+    with TestClient(app) as client:
+        for name, owner in (
+            ("search_top10", None),
+            ("search_top10_owner", "benchmark-owner"),
+        ):
+            hits = []
+
+            def search():
+                response = client.get(
+                    "/v1/search",
+                    params={"q": next(queries), "k": 10}
+                    | ({"owner_user_id": owner} if owner else {}),
+                )
+                response.raise_for_status()
+                hits.append(len(response.json()["results"]))
+
+            samples = measure(search, args.search_queries, warmup=5)
+            results[f"{name}/{args.search_rows}"] = _stats(
+                samples, mean_hits=statistics.fmean(hits)
+            )
+
+
+def run_startup_suite(args, results: Results) -> None:
+    """Cold-start each entrypoint in a fresh interpreter (see startup.py)."""
+    from .startup import TARGETS
+
+    # Unset credentials: startup must not depend on them (clients are lazy).
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if not k.startswith(("SUPABASE_", "GEMINI_"))
+    }
+    for target in TARGETS:
+        print(f"- startup/{target}")
+        samples: Dict[str, List[float]] = {}
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, "-m", "apps.api.benchmarks.startup", target],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            timings = json.loads(output.strip().splitlines()[-1])
+            # Includes interpreter startup, as a process manager would see it.
+            timings["process_ms"] = (time.perf_counter() - started) * 1000
+            for name, value in timings.items():
+                samples.setdefault(name, []).append(value)
+        for name, values in samples.items():
+            results[f"startup_{target}/{name.removesuffix('_ms')}"] = _stats(values)
+
+
+def compare(
+    results: Results, baseline: Results, tolerance: float, min_delta_ms: float
+) -> List[str]:
+    """Return a message per benchmark whose median regressed past tolerance."""
+    regressions = []
+    for name, current in sorted(results.items()):
+        base = baseline.get(name)
+        if not base:
+            continue
+        delta = current["median_ms"] - base["median_ms"]
+        if delta > min_delta_ms and current["median_ms"] > base["median_ms"] * (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{name}: {base['median_ms']:.2f}ms -> {current['median_ms']:.2f}ms "
+                f"(+{delta / base['median_ms']:.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--suites",
+        default="stages",
+        help="comma-separated: stages, pipeline, search, startup",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=5.0)
+    parser.add_argument("--no-db", dest="db", action="store_false")
+    parser.add_argument(
+        "--pipeline-mode", choices=["eager", "live", "db"], default="eager"
+    )
+    parser.add_argument("--pipeline-jobs", type=int, default=4)
+    parser.add_argument("--pipeline-timeout-s", type=float, default=300)
+    parser.add_argument("--worker-concurrency", type=int, default=4)
+    parser.add_argument("--worker-startup-s", type=float, default=5)
+    parser.add_argument("--search-rows", type=int, default=10_000)
+    parser.add_argument("--search-queries", type=int, default=50)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", help="write results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    from .fakes import install_fakes
+
+    storage_dir = tempfile.mkdtemp(prefix="paperpilot-bench-")
+    install_fakes(storage_dir, args.llm_latency_ms)
+
+    suites = {s.strip() for s in args.suites.split(",") if s.strip()}
+    if args.db and not _db_available():
+        args.db = False
+    if args.db:
+        from ..migrate import migrate
+
+        migrate()
+
+    results: Results = {}
+    if "startup" in suites:
+        run_startup_suite(args, results)
+    if "stages" in suites:
+        run_stage_suite(args, results)
+    if "pipeline" in suites and args.db:
+        run_pipeline_suite(args, results, storage_dir)
+    if "search" in suites and args.db:
+        run_search_suite(args, results)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    for name, stats in sorted(results.items()):
+        print(
+            f"{name:32s} median {stats['median_ms']:10.2f}ms  p95 {stats['p95_ms']:10.2f}ms"
+        )
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+# apps/api/benchmarks/startup.py
+"""Child process for the `startup` suite in run.py.
+
+`python -m apps.api.benchmarks.startup <target>` imports one entrypoint in a
+fresh interpreter and prints its timings as JSON. For the API it also serves
+a first request through TestClient, which runs the lifespan handler.
+"""
+
+import importlib
+import json
+import sys
+import time
+
+TARGETS = {
+    "api": "apps.api.main",
+    "celery_worker": "apps.api.tasks",
+    "db_worker": "apps.api.worker",
+}
+
+
+def main(target: str) -> dict:
+    started = time.perf_counter()
+    module = importlib.import_module(TARGETS[target])
+    result = {"import_ms": (time.perf_counter() - started) * 1000}
+
+    if target == "api":
+        from fastapi.testclient import TestClient
+
+        with TestClient(module.app) as client:
+            client.get("/").raise_for_status()
+            result["first_request_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(sys.argv[1])))
@@ -0,0 +1,85 @@
+# apps/api/benchmarks/synthetic.py
+"""Deterministic synthetic PDFs for benchmarks (no external fixtures)."""
+
+import random
+from typing import Dict, List
+
+_VOCAB = (
+    "attention transformer encoder decoder gradient descent stochastic "
+    "convolution network layer embedding token sequence benchmark dataset "
+    "evaluation baseline ablation accuracy precision recall latency throughput "
+    "model training inference regularization dropout optimizer learning rate "
+    "hypothesis experiment result analysis theorem proof lemma corollary "
+    "distribution probability variance estimator sampling bayesian posterior"
+).split()
+
+WORDS_PER_LINE = 12
+LINES_PER_PAGE = 48
+
+# Named sizes used by the benchmark suites.
+SIZES: Dict[str, int] = {"small": 5, "medium": 30, "large": 150}
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_lines(rng: random.Random, words_per_page: int) -> List[str]:
+    lines = []
+    words = [rng.choice(_VOCAB) for _ in range(words_per_page)]
+    for start in range(0, len(words), WORDS_PER_LINE):
+        line = " ".join(words[start : start + WORDS_PER_LINE])
+        # Hyphenated line breaks exercise clean_text's de-hyphenation.
+        if rng.random() < 0.1:
+            line += " hyphen-"
+        lines.append(line)
+    return lines[:LINES_PER_PAGE]
+
+
+def make_pdf(num_pages: int, words_per_page: int = 400, seed: int = 0) -> bytes:
+    """Build an uncompressed text PDF with `num_pages` pages of pseudo-prose."""
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    # Objects are numbered in insertion order: font, then (content, page)
+    # pairs, then the page tree, then the catalog.
+    pages_id = 2 + 2 * num_pages
+    page_ids = []
+    for _ in range(num_pages):
+        ops = " ".join(
+            f"({_escape(line)}) '" for line in _page_lines(rng, words_per_page)
+        )
+        stream = f"BT /F1 10 Tf 50 760 Td 14 TL {ops} ET".encode("latin-1")
+        content_id = add(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        page_ids.append(
+            add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                % (pages_id, font_id, content_id)
+            )
+        )
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, num_pages))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        catalog_id,
+        xref_at,
+    )
+    return bytes(out)
@@ -0,0 +1,172 @@
+# apps/api/core/cache.py
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import redis
+
+from .celery_app import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Local entries live briefly so a delete on another API process is picked up
+# quickly; Redis holds the shared copy for much longer.
+RESPONSE_CACHE_LRU_SIZE = int(os.getenv("RESPONSE_CACHE_LRU_SIZE", "2048"))
+RESPONSE_CACHE_LRU_TTL = float(os.getenv("RESPONSE_CACHE_LRU_TTL", "30"))
+RESPONSE_CACHE_REDIS_TTL = int(os.getenv("RESPONSE_CACHE_REDIS_TTL", "86400"))
+# invalidate() leaves a tombstone that blocks set() for this long, so a body
+# built from a row read just before the invalidation is not cached. It only
+# needs to outlast one request.
+RESPONSE_CACHE_TOMBSTONE_TTL = int(os.getenv("RESPONSE_CACHE_TOMBSTONE_TTL", "10"))
+# After a Redis error, skip it for this long instead of paying a timeout per request.
+_REDIS_RETRY_AFTER = 10.0
+# Stored in Redis by invalidate(); cached bodies are JSON and never empty.
+_TOMBSTONE = b""
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class ResponseCache:
+    """Read-through cache of pre-serialized JSON bodies.
+
+    An in-process LRU sits in front of Redis. Redis failures are logged and
+    treated as misses, so the API keeps working from Postgres. In the LRU a
+    value of None is a tombstone left by invalidate().
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        lru_size: int,
+        lru_ttl: float,
+        redis_ttl: int,
+        tombstone_ttl: int = RESPONSE_CACHE_TOMBSTONE_TTL,
+    ):
+        self.redis_url = redis_url
+        self.lru_size = lru_size
+        self.lru_ttl = lru_ttl
+        self.redis_ttl = redis_ttl
+        self.tombstone_ttl = tombstone_ttl
+        self._lru: "OrderedDict[str, tuple[float, Optional[CachedBody]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._redis: Optional[redis.Redis] = None
+        self._redis_down_until = 0.0
+
+    def _client(self) -> Optional[redis.Redis]:
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.2, socket_connect_timeout=0.2
+            )
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning("Response cache Redis error, bypassing for a while: %s", exc)
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_AFTER
+
+    def _invalidated(self, key: str) -> bool:
+        """True while `key` has a live tombstone in the LRU. Caller holds _lock."""
+        entry = self._lru.get(key)
+        return entry is not None and entry[1] is None and entry[0] > time.monotonic()
+
+    def _lru_put(
+        self, key: str, value: Optional[CachedBody], ttl: float, force: bool = True
+    ) -> None:
+        with self._lock:
+            if not force and self._invalidated(key):
+                return
+            self._lru[key] = (time.monotonic() + ttl, value)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._lru.move_to_end(key)
+                    return value
+                del self._lru[key]
+
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            body = client.get(key)
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+            return None
+        if not body:  # missing, or a tombstone
+            return None
+        value = CachedBody(body, make_etag(body))
+        self._lru_put(key, value, self.lru_ttl, force=False)
+        return value
+
+    def set(self, key: str, body: bytes) -> CachedBody:
+        """Cache `body` unless `key` was invalidated since it was last missing.
+
+        Returns the body with its ETag either way, for the current response.
+        """
+        value = CachedBody(body, make_etag(body))
+        with self._lock:
+            if self._invalidated(key):
+                return value
+        client = self._client()
+        if client is not None:
+            try:
+                # NX: never overwrite a tombstone written by another process.
+                if not client.set(key, body, ex=self.redis_ttl, nx=True):
+                    return value
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+        self._lru_put(key, value, self.lru_ttl, force=False)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop `keys` and block set() on them for tombstone_ttl seconds."""
+        for key in keys:
+            self._lru_put(key, None, self.tombstone_ttl)
+        client = self._client()
+        if client is not None and keys:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.set(key, _TOMBSTONE, ex=self.tombstone_ttl)
+                pipe.execute()
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+
+
+def job_cache_keys(job_id) -> tuple[str, str]:
+    """(results key, status key) for a job.
+
+    Keys use the canonical UUID spelling, so every way of writing the same id
+    in a URL maps to the same entry.
+    """
+    job_id = str(uuid.UUID(str(job_id)))
+    return f"job:{job_id}:results", f"job:{job_id}:status"
+
+
+response_cache = ResponseCache(
+    REDIS_URL,
+    lru_size=RESPONSE_CACHE_LRU_SIZE,
+    lru_ttl=RESPONSE_CACHE_LRU_TTL,
+    redis_ttl=RESPONSE_CACHE_REDIS_TTL,
+)
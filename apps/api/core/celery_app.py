@@ -1,8 +1,13 @@
 import os
 from celery import Celery
 
+from .metrics import instrument_celery_metrics
+from .tracing import instrument_celery
+
 # Load Redis URL from env, default to localhost for dev
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# How often `celery beat` enqueues the garbage-collection sweep.
+SWEEP_INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "3600"))
 
 celery_app = Celery("worker", broker=REDIS_URL, backend=REDIS_URL)
 
@@ -13,4 +18,10 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     include=["apps.api.tasks"],
+    beat_schedule={
+        "sweep-jobs": {"task": "sweep_jobs", "schedule": SWEEP_INTERVAL_SECONDS},
+    },
 )
+
+instrument_celery()
+instrument_celery_metrics()
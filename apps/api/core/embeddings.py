@@ -0,0 +1,129 @@
+# apps/api/core/embeddings.py
+import hashlib
+import math
+import os
+import re
+import time
+from functools import lru_cache
+from typing import List, Protocol, Sequence
+
+# Vector size is fixed by the `section.embeddings` column, so every provider
+# must return vectors of exactly this dimension.
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "gemini-embedding-001")
+# Gemini accepts at most 100 contents per embed request.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+# Rough character budget per input (~2k tokens); longer texts are truncated.
+EMBEDDING_MAX_CHARS = int(os.getenv("EMBEDDING_MAX_CHARS", "8000"))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class EmbeddingProvider(Protocol):
+    """Turns a batch of texts into vectors of length EMBEDDING_DIM."""
+
+    def embed(self, texts: Sequence[str], task_type: str) -> List[List[float]]: ...
+
+
+class GeminiEmbeddingProvider:
+    """Embeddings from the Gemini Developer API."""
+
+    def __init__(self, api_key: str, model: str = EMBEDDING_MODEL):
+        # Imported here so that models (which only need EMBEDDING_DIM) and the
+        # fake provider do not load the Gemini SDK.
+        from google import genai
+
+        self.client = genai.Client(api_key=api_key)
+        self.model = model
+
+    def embed(self, texts: Sequence[str], task_type: str) -> List[List[float]]:
+        from google.genai import errors, types
+
+        last_error: Exception | None = None
+        for attempt in range(3):
+            try:
+                response = self.client.models.embed_content(
+                    model=self.model,
+                    contents=list(texts),
+                    config=types.EmbedContentConfig(
+                        task_type=task_type,
+                        output_dimensionality=EMBEDDING_DIM,
+                    ),
+                )
+                return [_normalize(e.values) for e in response.embeddings]
+            except errors.APIError as exc:
+                last_error = exc
+                # Same rate-limit handling as generate_section_summary.
+                if exc.code == 429:
+                    time.sleep(5 * (attempt + 1))
+                    continue
+                raise
+        if last_error:
+            raise last_error
+        raise RuntimeError("Failed to generate embeddings for unknown reasons.")
+
+
+class FakeEmbeddingProvider:
+    """Deterministic, offline provider for tests and local development.
+
+    Hashes each word into a signed bucket (feature hashing), so texts that
+    share vocabulary end up close in cosine space and search results are
+    still meaningful without calling an external API.
+    """
+
+    def embed(self, texts: Sequence[str], task_type: str) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+    @staticmethod
+    def _embed_one(text: str) -> List[float]:
+        vector = [0.0] * EMBEDDING_DIM
+        for token in _TOKEN_RE.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            index = value % EMBEDDING_DIM
+            vector[index] += 1.0 if (value >> 63) & 1 else -1.0
+        return _normalize(vector)
+
+
+def _normalize(values: Sequence[float]) -> List[float]:
+    """L2-normalize so cosine distance and inner product agree."""
+    norm = math.sqrt(sum(v * v for v in values))
+    if norm == 0:
+        return [0.0] * len(values)
+    return [v / norm for v in values]
+
+
+@lru_cache(maxsize=1)
+def _gemini_provider(api_key: str) -> GeminiEmbeddingProvider:
+    # One client per process instead of one per search request.
+    return GeminiEmbeddingProvider(api_key)
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Pick the provider from EMBEDDING_PROVIDER ("gemini" or "fake")."""
+    name = os.getenv("EMBEDDING_PROVIDER", "gemini").lower()
+    if name == "fake":
+        return FakeEmbeddingProvider()
+    if name == "gemini":
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not set")
+        return _gemini_provider(api_key)
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER: {name}")
+
+
+def embed_documents(
+    provider: EmbeddingProvider, texts: Sequence[str]
+) -> List[List[float]]:
+    """Embed texts in provider-sized batches, preserving input order."""
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        batch = [
+            t[:EMBEDDING_MAX_CHARS] for t in texts[start : start + EMBEDDING_BATCH_SIZE]
+        ]
+        vectors.extend(provider.embed(batch, task_type="RETRIEVAL_DOCUMENT"))
+    return vectors
+
+
+def embed_query(provider: EmbeddingProvider, text: str) -> List[float]:
+    return provider.embed([text[:EMBEDDING_MAX_CHARS]], task_type="RETRIEVAL_QUERY")[0]
@@ -0,0 +1,55 @@
+# apps/api/core/job_queue.py
+"""Selects who runs queued jobs: Celery (default) or the Postgres-backed worker.
+
+With JOB_BACKEND=db the API only commits `queued` Job rows and sends a NOTIFY;
+`python -m apps.api.worker` claims them with FOR UPDATE SKIP LOCKED, so no
+Redis is needed. Run exactly one of the two backends against a database.
+
+Celery tasks are addressed by name, so the API never imports tasks.py (and
+with it pypdf, the Gemini SDK and the pipeline code).
+"""
+
+import os
+
+from celery import group
+from sqlalchemy import text
+
+from ..deps.db import engine
+from .celery_app import celery_app
+
+JOB_BACKEND = os.getenv("JOB_BACKEND", "celery").lower()
+if JOB_BACKEND not in ("celery", "db"):
+    raise ValueError(f"Unknown JOB_BACKEND: {JOB_BACKEND}")
+
+NOTIFY_CHANNEL = "paperpilot_jobs"
+# NOTIFY payloads: new queued jobs, or soft-deleted jobs waiting for a purge.
+NOTIFY_JOBS = "jobs"
+NOTIFY_PURGE = "purge"
+
+
+def notify_workers(payload: str) -> None:
+    """Wake idle DB workers. Delivered when the notifying transaction commits."""
+    with engine.begin() as conn:
+        conn.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": NOTIFY_CHANNEL, "payload": payload},
+        )
+
+
+def enqueue_jobs(job_ids: list[str]) -> None:
+    """Hand committed `queued` jobs to the configured backend."""
+    if JOB_BACKEND == "db":
+        # worker.py claims the rows itself; the NOTIFY only cuts its wait short.
+        notify_workers(NOTIFY_JOBS)
+        return
+    group(
+        celery_app.signature("process_pdf", args=[job_id]) for job_id in job_ids
+    ).apply_async()
+
+
+def enqueue_purge(job_id: str) -> None:
+    """Schedule the hard delete of a soft-deleted job."""
+    if JOB_BACKEND == "db":
+        notify_workers(NOTIFY_PURGE)
+        return
+    celery_app.signature("purge_job", args=[job_id]).apply_async()
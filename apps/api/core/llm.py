@@ -1,16 +1,20 @@
 # apps/api/core/llm.py
 import os
 import time
-from typing import List
+from typing import List, Tuple, Type, TypeVar
 
-from google import genai
-from google.genai import errors
-from google.genai import types
 from pydantic import BaseModel, Field
 
-# Configure client once at import time (Gemini Developer API)
+from .metrics import LLM_RATE_LIMITED, LLM_REQUEST_DURATION, LLM_TOKENS
+from .tracing import stage_span
+
+# Gemini Developer API client, created on first use: importing the SDK
+# costs about half a second, which API processes should not pay at startup.
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
+client = None
+MODEL_NAME = "gemini-2.5-flash"
+
+T = TypeVar("T", bound=BaseModel)
 
 
 class SectionAnalysis(BaseModel):
@@ -24,39 +28,156 @@ class SectionAnalysis(BaseModel):
     )
 
 
-def generate_section_summary(text_content: str) -> SectionAnalysis:
-    """Send text to Gemini and return structured analysis."""
+class Flashcard(BaseModel):
+    question: str = Field(description="A short question about a key concept.")
+    answer: str = Field(description="The answer, in one or two sentences.")
+
+
+class QuizQuestion(BaseModel):
+    question: str = Field(description="A multiple-choice question.")
+    options: List[str] = Field(description="Exactly 4 answer options.")
+    answer_index: int = Field(description="Index of the correct option (0-3).")
+    explanation: str = Field(description="Why the correct option is right.")
+
+
+class StudyMaterial(BaseModel):
+    """Structured output for paper-level study aids."""
+
+    flashcards: List[Flashcard] = Field(
+        description="8-12 flashcards covering the paper's key concepts and findings."
+    )
+    quiz: List[QuizQuestion] = Field(
+        description="5-8 multiple-choice questions testing understanding of the paper."
+    )
+
+
+class LLMUsage(BaseModel):
+    """Token counts reported by Gemini for one successful call."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def get_client():
+    """Gemini client for this process; benchmarks assign a fake to `client`."""
+    global client
     if client is None:
-        raise ValueError("GEMINI_API_KEY not set")
+        if not GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY not set")
+        from google import genai
 
-    prompt = (
-        "You are an expert academic researcher. Analyze the following text from a research paper section.\n\n"
-        "TEXT TO ANALYZE:\n"
-        f"{text_content}\n\n"
-        "Return JSON matching the schema: "
-        "{summary: string, claims: string array}."
+        client = genai.Client(api_key=GEMINI_API_KEY)
+    return client
+
+
+def _record_usage(response) -> LLMUsage:
+    meta = getattr(response, "usage_metadata", None)
+    usage = LLMUsage(
+        prompt_tokens=getattr(meta, "prompt_token_count", None) or 0,
+        completion_tokens=getattr(meta, "candidates_token_count", None) or 0,
     )
+    LLM_TOKENS.labels(MODEL_NAME, "prompt").inc(usage.prompt_tokens)
+    LLM_TOKENS.labels(MODEL_NAME, "completion").inc(usage.completion_tokens)
+    return usage
+
+
+def _generate_structured(prompt: str, schema: Type[T]) -> Tuple[T, LLMUsage]:
+    """Call Gemini with a JSON response schema, retrying on rate limits."""
+    from google.genai import errors, types
+
+    gemini = get_client()
 
     last_error: Exception | None = None
     for attempt in range(3):
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    response_schema=SectionAnalysis,
-                ),
-            )
-            return SectionAnalysis.model_validate_json(response.text)
+            with stage_span(
+                "llm.generate_content",
+                **{
+                    "llm.model": MODEL_NAME,
+                    "llm.schema": schema.__name__,
+                    "llm.attempt": attempt,
+                    "llm.prompt_chars": len(prompt),
+                },
+            ):
+                response = gemini.models.generate_content(
+                    model=MODEL_NAME,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        response_mime_type="application/json",
+                        response_schema=schema,
+                    ),
+                )
+            outcome = "ok"
+            return schema.model_validate_json(response.text), _record_usage(response)
         except errors.APIError as exc:
             last_error = exc
             # Handle rate limits with a short backoff then retry.
             if exc.code == 429:
-                time.sleep(5 * (attempt + 1))
+                outcome = "rate_limited"
+                LLM_RATE_LIMITED.labels(MODEL_NAME).inc()
+                with stage_span("llm.rate_limit_backoff", **{"llm.attempt": attempt}):
+                    time.sleep(5 * (attempt + 1))
                 continue
             raise
+        finally:
+            LLM_REQUEST_DURATION.labels(MODEL_NAME, schema.__name__, outcome).observe(
+                time.perf_counter() - started
+            )
     # If we exhausted retries, re-raise the last API error.
     if last_error:
         raise last_error
-    raise RuntimeError("Failed to generate section summary for unknown reasons.")
+    raise RuntimeError("Failed to generate content for unknown reasons.")
+
+
+def _format_parts(parts: List[SectionAnalysis]) -> str:
+    blocks = []
+    for i, part in enumerate(parts, start=1):
+        claims = "\n".join(f"- {c}" for c in part.claims)
+        blocks.append(f"PART {i}\nSummary: {part.summary}\nKey claims:\n{claims}")
+    return "\n\n".join(blocks)
+
+
+def generate_section_summary(text_content: str) -> Tuple[SectionAnalysis, LLMUsage]:
+    """Send text to Gemini and return structured analysis and token usage."""
+    prompt = (
+        "You are an expert academic researcher. Analyze the following text from a research paper section.\n\n"
+        "TEXT TO ANALYZE:\n"
+        f"{text_content}\n\n"
+        "Return JSON matching the schema: "
+        "{summary: string, claims: string array}."
+    )
+    return _generate_structured(prompt, SectionAnalysis)
+
+
+def combine_section_analyses(parts: List[SectionAnalysis]) -> SectionAnalysis:
+    """Merge consecutive partial analyses (in paper order) into one.
+
+    Used for the reduce step: callers bound len(parts), so the prompt size
+    stays constant no matter how long the paper is.
+    """
+    prompt = (
+        "You are an expert academic researcher. The following are summaries of "
+        "consecutive parts of the same research paper, in reading order.\n\n"
+        f"{_format_parts(parts)}\n\n"
+        "Merge them into a single coherent summary of 3-5 sentences and keep the "
+        "3-5 most important claims. Return JSON matching the schema: "
+        "{summary: string, claims: string array}."
+    )
+    analysis, _ = _generate_structured(prompt, SectionAnalysis)
+    return analysis
+
+
+def generate_study_material(paper: SectionAnalysis) -> StudyMaterial:
+    """Build flashcards and a quiz from the paper-level analysis."""
+    prompt = (
+        "You are an expert academic tutor. Using the summary and key claims of a "
+        "research paper below, write study flashcards and a multiple-choice quiz.\n\n"
+        f"{_format_parts([paper])}\n\n"
+        "Return JSON matching the schema: "
+        "{flashcards: [{question, answer}], "
+        "quiz: [{question, options, answer_index, explanation}]}."
+    )
+    material, _ = _generate_structured(prompt, StudyMaterial)
+    return material
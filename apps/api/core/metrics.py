@@ -0,0 +1,215 @@
+# apps/api/core/metrics.py
+import logging
+import os
+import shutil
+import time
+from typing import Dict
+
+from celery import signals
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from .tracing import queue_wait_ms
+
+logger = logging.getLogger(__name__)
+
+# When set (required for prefork workers or multi-process uvicorn), every
+# process writes its samples to mmap files here and scrapes aggregate them.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9808"))
+CELERY_QUEUES = [
+    q.strip() for q in os.getenv("CELERY_QUEUES", "celery").split(",") if q.strip()
+]
+
+# Buckets span fast DB stages up to multi-minute LLM/reduce stages.
+_STAGE_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "paperpilot_http_request_duration_seconds",
+    "API request latency by route template.",
+    ["method", "route", "status"],
+)
+CELERY_TASK_DURATION = Histogram(
+    "paperpilot_celery_task_duration_seconds",
+    "Celery task run time.",
+    ["task", "state"],
+    buckets=_STAGE_BUCKETS,
+)
+CELERY_QUEUE_WAIT = Histogram(
+    "paperpilot_celery_queue_wait_seconds",
+    "Time between publishing a task and a worker starting it.",
+    ["task"],
+    buckets=_STAGE_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "paperpilot_stage_duration_seconds",
+    "Pipeline stage duration (same stages as the jobstage table).",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+)
+LLM_REQUEST_DURATION = Histogram(
+    "paperpilot_llm_request_duration_seconds",
+    "Latency of a single Gemini call.",
+    ["model", "schema", "outcome"],
+    buckets=_STAGE_BUCKETS,
+)
+LLM_RATE_LIMITED = Counter(
+    "paperpilot_llm_rate_limited_total",
+    "Gemini calls rejected with HTTP 429.",
+    ["model"],
+)
+LLM_TOKENS = Counter(
+    "paperpilot_llm_tokens_total",
+    "Tokens billed by Gemini.",
+    ["model", "kind"],
+)
+# pages/sec = rate(pages_total) / rate(processing_seconds_total)
+PDF_PAGES = Counter(
+    "paperpilot_pdf_pages_total",
+    "PDF pages processed.",
+    ["operation"],
+)
+PDF_PROCESSING_SECONDS = Counter(
+    "paperpilot_pdf_processing_seconds_total",
+    "Time spent processing PDF pages.",
+    ["operation"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "paperpilot_db_pool_checked_out",
+    "DB connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "paperpilot_db_pool_size",
+    "Configured DB pool size (excluding overflow).",
+    multiprocess_mode="livesum",
+)
+
+
+class QueueDepthCollector:
+    """Reads Celery queue lengths from Redis at scrape time."""
+
+    def __init__(self, redis_url: str, queues):
+        self.redis_url = redis_url
+        self.queues = queues
+        self._client = None
+
+    @staticmethod
+    def _family() -> GaugeMetricFamily:
+        return GaugeMetricFamily(
+            "paperpilot_celery_queue_depth",
+            "Messages waiting in each Celery queue.",
+            labels=["queue"],
+        )
+
+    def describe(self):
+        # Lets the registry learn metric names without a Redis round-trip.
+        return [self._family()]
+
+    def collect(self):
+        family = self._family()
+        try:
+            if self._client is None:
+                import redis
+
+                self._client = redis.Redis.from_url(self.redis_url, socket_timeout=0.5)
+            pipe = self._client.pipeline()
+            for queue in self.queues:
+                pipe.llen(queue)
+            for queue, depth in zip(self.queues, pipe.execute()):
+                family.add_metric([queue], depth)
+        except Exception as exc:
+            logger.warning("Failed to read Celery queue depth: %s", exc)
+        yield family
+
+
+def build_registry() -> CollectorRegistry:
+    """Registry to scrape: aggregated across processes when multiprocess."""
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def instrument_engine(engine) -> None:
+    """Track pool utilization through checkout/checkin events."""
+    from sqlalchemy import event
+
+    size = getattr(engine.pool, "size", None)
+
+    def on_checkout(*_):
+        # Set lazily so each forked worker reports its own pool.
+        if callable(size):
+            DB_POOL_SIZE.set(size())
+        DB_POOL_CHECKED_OUT.inc()
+
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", lambda *_: DB_POOL_CHECKED_OUT.dec())
+
+
+_task_started: Dict[str, float] = {}
+
+
+def _on_task_prerun(task_id=None, task=None, **_):
+    _task_started[task_id] = time.perf_counter()
+    wait = queue_wait_ms(task.request)
+    if wait is not None:
+        CELERY_QUEUE_WAIT.labels(task.name).observe(wait / 1000)
+
+
+def _on_task_postrun(task_id=None, task=None, state=None, **_):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+def _start_worker_exporter(**_):
+    # Runs in the main worker process before the pool forks.
+    if MULTIPROC_DIR:
+        shutil.rmtree(MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    else:
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR not set: prefork children metrics are not exported."
+        )
+    start_http_server(WORKER_METRICS_PORT, registry=build_registry())
+    logger.info("Worker metrics exporter listening on :%s", WORKER_METRICS_PORT)
+
+
+def _mark_process_dead(pid=None, **_):
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def instrument_celery_metrics() -> None:
+    signals.task_prerun.connect(_on_task_prerun, weak=False)
+    signals.task_postrun.connect(_on_task_postrun, weak=False)
+    signals.worker_init.connect(_start_worker_exporter, weak=False)
+    signals.worker_process_shutdown.connect(_mark_process_dead, weak=False)
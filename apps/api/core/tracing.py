@@ -0,0 +1,140 @@
+# apps/api/core/tracing.py
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+from celery import signals
+from opentelemetry import context, propagate, trace
+from opentelemetry.propagators.textmap import Getter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+
+# Spans are no-ops until configure_tracing() installs a provider, so importing
+# this module (and using stage_span) is always safe.
+tracer = trace.get_tracer("paperpilot")
+
+# Message header carrying the publish time, used to measure queue wait.
+PUBLISHED_AT_HEADER = "paperpilot_published_at"
+
+_configured = False
+
+
+def configure_tracing(service_name: str) -> None:
+    """Install the global tracer provider for this process.
+
+    OTEL_TRACES_EXPORTER selects the exporter: "otlp" (collector at
+    OTEL_EXPORTER_OTLP_ENDPOINT), "console" (stdout) or "none" (default).
+    """
+    global _configured
+    exporter_name = os.getenv("OTEL_TRACES_EXPORTER", "none").lower()
+    if _configured or exporter_name == "none":
+        return
+
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter()
+    elif exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        raise ValueError(f"Unknown OTEL_TRACES_EXPORTER: {exporter_name}")
+
+    service_name = os.getenv("OTEL_SERVICE_NAME", service_name)
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+
+
+@contextmanager
+def stage_span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Span around one pipeline stage; records errors on the span."""
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+class _CeleryRequestGetter(Getter):
+    """Reads propagated headers from a Celery task request."""
+
+    def get(self, carrier, key):
+        value = getattr(carrier, key, None)
+        if value is None:
+            return None
+        return [value] if isinstance(value, str) else list(value)
+
+    def keys(self, carrier):
+        return []
+
+
+_getter = _CeleryRequestGetter()
+_active_spans: Dict[str, Tuple[Span, object]] = {}
+
+
+def queue_wait_ms(request) -> float | None:
+    """Milliseconds between publish and execution for a task request."""
+    published_at = getattr(request, PUBLISHED_AT_HEADER, None)
+    if published_at is None:
+        return None
+    return max(0.0, (time.time() - float(published_at)) * 1000)
+
+
+def _inject_headers(headers=None, **_):
+    if headers is None:
+        return
+    propagate.inject(headers)
+    headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+def _start_task_span(task_id=None, task=None, **_):
+    parent = propagate.extract(task.request, getter=_getter)
+    if not trace.get_current_span(parent).get_span_context().is_valid:
+        # Eager/inline runs carry no headers: nest under the caller's span.
+        parent = None
+    span = tracer.start_span(
+        f"celery.task {task.name}",
+        context=parent,
+        kind=SpanKind.CONSUMER,
+        attributes={"celery.task_id": task_id, "celery.task_name": task.name},
+    )
+    wait = queue_wait_ms(task.request)
+    if wait is not None:
+        span.set_attribute("celery.queue_wait_ms", wait)
+    token = context.attach(trace.set_span_in_context(span))
+    _active_spans[task_id] = (span, token)
+
+
+def _end_task_span(task_id=None, state=None, **_):
+    entry = _active_spans.pop(task_id, None)
+    if entry is None:
+        return
+    span, token = entry
+    if state:
+        span.set_attribute("celery.state", state)
+    span.end()
+    context.detach(token)
+
+
+def _record_task_failure(task_id=None, exception=None, **_):
+    entry = _active_spans.get(task_id)
+    if entry is None or exception is None:
+        return
+    span, _ = entry
+    span.record_exception(exception)
+    span.set_status(Status(StatusCode.ERROR, str(exception)))
+
+
+def instrument_celery() -> None:
+    """Propagate trace context through message headers and wrap task runs."""
+    signals.before_task_publish.connect(_inject_headers, weak=False)
+    signals.task_prerun.connect(_start_task_span, weak=False)
+    signals.task_postrun.connect(_end_task_span, weak=False)
+    signals.task_failure.connect(_record_task_failure, weak=False)
+    # Span processors own a background thread, so set them up after fork.
+    signals.worker_process_init.connect(
+        lambda **_: configure_tracing("paperpilot-worker"), weak=False
+    )
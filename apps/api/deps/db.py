@@ -2,7 +2,9 @@
 import os
 
 from dotenv import load_dotenv
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, create_engine
+
+from ..core.metrics import instrument_engine
 
 load_dotenv()
 
@@ -17,15 +19,18 @@ DEFAULT_DATABASE_URL = (
     f"{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
 DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+# SQLAlchemy's defaults; worker.py needs about
+# WORKER_CONCURRENCY * WORKER_SECTION_CONCURRENCY + 3 connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
 
 engine = create_engine(
     DATABASE_URL,
     echo=os.getenv("SQL_ECHO", "true").lower() == "true",
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
 )
-
-
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+instrument_engine(engine)
 
 
 def get_session():
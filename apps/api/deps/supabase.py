@@ -1,31 +1,42 @@
 import os
 import logging
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING
 
-logger = logging.getLogger(__name__)
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+if TYPE_CHECKING:
+    from supabase import Client
 
-supabase: Client | None = None
+logger = logging.getLogger(__name__)
 
-if SUPABASE_URL and SUPABASE_KEY:
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        logger.info("✅ Supabase client initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Supabase client: {e}")
-else:
-    logger.warning(
-        "⚠️ SUPABASE_URL or SUPABASE_KEY not set. Storage features will fail."
-    )
+# Created on first use: importing the supabase SDK is slow and processes that
+# never touch storage (search, status polling) should not need its settings.
+_client: "Client | None" = None
+_lock = threading.Lock()
 
 
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     """
-    Returns the Supabase client instance.
-    Raises an error if not configured, ensuring workers fail fast if config is missing.
+    Returns the Supabase client instance, creating it on first call.
+    Raises an error if not configured, so callers fail fast if config is missing.
     """
-    if not supabase:
-        raise ValueError("Supabase client is not configured. Check .env variables.")
-    return supabase
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                url = os.getenv("SUPABASE_URL")
+                key = os.getenv("SUPABASE_KEY")
+                if not (url and key):
+                    raise ValueError(
+                        "Supabase client is not configured. Check .env variables."
+                    )
+                from supabase import create_client
+
+                _client = create_client(url, key)
+                logger.info("✅ Supabase client initialized")
+    return _client
+
+
+def set_supabase_client(client) -> None:
+    """Replace the client, e.g. with the filesystem-backed fake in benchmarks."""
+    global _client
+    _client = client
@@ -1,18 +1,42 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import jobs
-from .deps.db import create_db_and_tables, engine
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from .core.celery_app import REDIS_URL
+from .core.metrics import (
+    CELERY_QUEUES,
+    HTTP_REQUEST_DURATION,
+    QueueDepthCollector,
+    build_registry,
+)
+from .core.tracing import configure_tracing
+from .routes import jobs, search
+from .deps.db import engine
 from fastapi.responses import JSONResponse
 from sqlmodel import Session
 from sqlalchemy import text
 import time
 
-app = FastAPI()
+configure_tracing("paperpilot-api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is managed by `python -m apps.api.migrate`, not at startup;
+    # clients (Supabase, Gemini) are created on first use.
+    yield
+    engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 origins = [
     "http://localhost:3010",
     "http://localhost:3011",
 ]
 app.include_router(jobs.router)
+app.include_router(search.router)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -20,10 +44,29 @@ app.add_middleware(
     allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
 )
+# Server spans per request; Celery publishes inherit them as parent context.
+FastAPIInstrumentor.instrument_app(app, excluded_urls="health,metrics")
 
-@app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+metrics_registry = build_registry()
+metrics_registry.register(QueueDepthCollector(REDIS_URL, CELERY_QUEUES))
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded.
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status),
+        ).observe(time.perf_counter() - started)
 
 
 @app.get("/")
@@ -31,6 +74,12 @@ async def root():
     return {"message": "Hello World"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (aggregated across processes if multiprocess)."""
+    return Response(generate_latest(metrics_registry), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health", tags=["system"])
 async def health():
     """Unified liveness + readiness.
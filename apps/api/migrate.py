@@ -0,0 +1,136 @@
+"""Create or upgrade the database schema.
+
+Run once per deploy, before the API and workers start:
+
+    python -m apps.api.migrate
+
+Every step is idempotent. `create_all` only creates missing tables, so the
+columns, column types, foreign keys and indexes added to existing tables
+since they were first created are applied here as well.
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel
+
+from .core.embeddings import EMBEDDING_DIM
+from .deps.db import engine
+
+from .models import (  # noqa: F401 - registers every table on SQLModel.metadata
+    job_model,
+    job_stage_model,
+    section_model,
+    summary_model,
+)
+
+logger = logging.getLogger(__name__)
+
+# Postgres adds constant defaults without rewriting the table.
+_ADDED_COLUMNS = [
+    ("job", "deleted_at", "TIMESTAMP WITH TIME ZONE"),
+    ("job", "locked_by", "VARCHAR"),
+    ("job", "lease_expires_at", "TIMESTAMP WITH TIME ZONE"),
+    ("job", "attempts", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# (table, column, referenced table) for foreign keys that must cascade.
+_CASCADE_FKS = [
+    ("section", "job_id", "job"),
+    ("summary", "section_id", "section"),
+    ("jobstage", "job_id", "job"),
+]
+
+
+def _upgrade_embeddings_column(conn) -> None:
+    udt_name = conn.execute(
+        text(
+            "SELECT udt_name FROM information_schema.columns "
+            "WHERE table_name = 'section' AND column_name = 'embeddings'"
+        )
+    ).scalar()
+    if udt_name == "vector":
+        return
+    # Older schemas stored embeddings as text; those values are not usable
+    # as vectors, so they are dropped and sections get re-embedded.
+    logger.info("Converting section.embeddings to vector(%s)", EMBEDDING_DIM)
+    conn.execute(
+        text(
+            f"ALTER TABLE section ALTER COLUMN embeddings "
+            f"TYPE vector({EMBEDDING_DIM}) USING NULL"
+        )
+    )
+
+
+def _cascade_foreign_keys(conn) -> None:
+    inspector = inspect(conn)
+    for table, column, referred in _CASCADE_FKS:
+        for fk in inspector.get_foreign_keys(table):
+            if fk["constrained_columns"] != [column]:
+                continue
+            if (fk.get("options") or {}).get("ondelete", "").upper() == "CASCADE":
+                continue
+            name = fk["name"]
+            logger.info("Making %s.%s ON DELETE CASCADE", table, column)
+            # Added NOT VALID so the exclusive lock covers only the swap;
+            # existing rows are checked by _validate_foreign_keys.
+            conn.execute(
+                text(
+                    f'ALTER TABLE {table} DROP CONSTRAINT "{name}", '
+                    f'ADD CONSTRAINT "{name}" FOREIGN KEY ({column}) '
+                    f"REFERENCES {referred} (id) ON DELETE CASCADE NOT VALID"
+                )
+            )
+
+
+def _validate_foreign_keys() -> None:
+    """VALIDATE every NOT VALID foreign key left by _cascade_foreign_keys.
+
+    Each runs in its own transaction, after the swap has committed: VALIDATE
+    only takes a SHARE UPDATE EXCLUSIVE lock, so reads and writes continue
+    while existing rows are checked. This also finishes a run that was
+    interrupted between the two steps.
+    """
+    tables = sorted({table for table, _, _ in _CASCADE_FKS})
+    with engine.connect() as conn:
+        pending = conn.execute(
+            text(
+                "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+                "WHERE contype = 'f' AND NOT convalidated "
+                "AND conrelid::regclass::text = ANY(:tables)"
+            ),
+            {"tables": tables},
+        ).all()
+    for table, name in pending:
+        logger.info("Validating %s.%s", table, name)
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {table} VALIDATE CONSTRAINT "{name}"'))
+
+
+def migrate() -> None:
+    # Section.embeddings is a pgvector column; the extension must exist first.
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    SQLModel.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        for table, column, ddl in _ADDED_COLUMNS:
+            conn.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}")
+            )
+        _upgrade_embeddings_column(conn)
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    with engine.begin() as conn:
+        _cascade_foreign_keys(conn)
+    _validate_foreign_keys()
+    logger.info("Database schema is up to date")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+    )
+    migrate()
@@ -3,7 +3,7 @@ import uuid
 import enum
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index, text
 
 
 class SourceType(str, enum.Enum):
@@ -19,6 +19,21 @@ class JobStatus(str, enum.Enum):
 
 
 class Job(SQLModel, table=True):
+    __table_args__ = (
+        # Claim queue for worker.py: only rows a worker can still pick up.
+        Index(
+            "ix_job_claimable",
+            "created_at",
+            postgresql_where=text("status = 'queued' AND deleted_at IS NULL"),
+        ),
+        # Jobs whose worker lease may run out and be reclaimed by another.
+        Index(
+            "ix_job_lease_expiry",
+            "lease_expires_at",
+            postgresql_where=text("status = 'processing'"),
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
     owner_user_id: str = Field(index=True)
     source_type: SourceType = Field(sa_column=Column(Enum(SourceType)))
@@ -37,5 +52,22 @@ class Job(SQLModel, table=True):
     )
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            onupdate=lambda: datetime.now(timezone.utc),
+        ),
+    )
+    # Set by DELETE /v1/jobs/{id}; rows and storage are purged in the background.
+    deleted_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True, index=True),
+    )
+    # Lease held by the Postgres-backed worker (worker.py) while it runs the
+    # job; another worker may reclaim the job once the lease has expired.
+    locked_by: Optional[str] = Field(default=None, nullable=True)
+    lease_expires_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
     )
+    attempts: int = Field(default=0)
@@ -0,0 +1,15 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+
+class JobStage(SQLModel, table=True):
+    """One timed pipeline stage of a job (queue wait, download, parse, ...)."""
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    job_id: UUID = Field(foreign_key="job.id", ondelete="CASCADE", index=True)
+    stage: str = Field(index=True)
+    duration_ms: float
+    trace_id: Optional[str] = Field(default=None, nullable=True)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
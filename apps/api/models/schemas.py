@@ -29,6 +29,39 @@ class LinkCreateRequest(BaseModel):
     owner_user_id: Optional[str] = None
 
 
+class BatchLinkCreateRequest(BaseModel):
+    # arXiv abs/pdf URLs or bare ids such as "2101.00001".
+    urls: List[str] = Field(min_length=1, max_length=500)
+    owner_user_id: Optional[str] = None
+
+
+class BatchJobCreated(BaseModel):
+    input: str
+    job_id: UUID
+    arxiv_id: str
+    status: Literal["queued"]
+
+
+class BatchItemError(BaseModel):
+    input: str
+    code: str
+    message: str
+
+
+class BatchJobCreateResponse(BaseModel):
+    jobs: List[BatchJobCreated]
+    errors: List[BatchItemError]
+
+
+class BatchStatusRequest(BaseModel):
+    job_ids: List[UUID] = Field(min_length=1, max_length=500)
+
+
+class BatchStatusResponse(BaseModel):
+    jobs: List[JobStatusResponse]
+    not_found: List[UUID]
+
+
 class PDFCreateRequest(BaseModel):
     pdf_base64: str
     owner_user_id: Optional[str] = None
@@ -57,3 +90,17 @@ class ErrorResponse(BaseModel):
     code: str
     message: str
     request_id: Optional[str] = None
+
+
+class SearchHit(BaseModel):
+    section_id: UUID
+    job_id: UUID
+    title: Optional[str] = None
+    order: Optional[int] = None
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchHit]
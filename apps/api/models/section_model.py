@@ -1,15 +1,36 @@
-from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional
+from sqlmodel import SQLModel, Field, Relationship, Column
+from typing import List, Optional
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Index
+
+from ..core.embeddings import EMBEDDING_DIM
+
 
 class Section(SQLModel, table=True):
+    __table_args__ = (
+        # Approximate nearest-neighbour index for /v1/search (cosine distance).
+        Index(
+            "ix_section_embeddings_hnsw",
+            "embeddings",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embeddings": "vector_cosine_ops"},
+        ),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    job_id: Optional[UUID] = Field(default=None, foreign_key="job.id")
+    job_id: Optional[UUID] = Field(
+        default=None, foreign_key="job.id", ondelete="CASCADE", index=True
+    )
     title: Optional[str] = Field(default=None, index=True)
     order: Optional[int] = Field(default=None, index=True)
     content: Optional[str] = Field(default=None, nullable=True)
-    embeddings: Optional[str] = Field(default=None, nullable=True)
+    # float32 vector stored natively by pgvector (4 bytes per dimension).
+    embeddings: Optional[List[float]] = Field(
+        default=None, sa_column=Column(Vector(EMBEDDING_DIM), nullable=True)
+    )
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 
 class Summary(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    section_id: UUID = Field(foreign_key="section.id", index=True)
+    section_id: UUID = Field(foreign_key="section.id", ondelete="CASCADE", index=True)
     summary_text: str
     key_claims: List[str] = Field(default=[], sa_type=JSON)  # Liste de points clés
     prompt_tokens: int = 0
@@ -2,23 +2,34 @@ import json
 import logging
 import os
 import uuid
+from datetime import datetime, timezone
 from typing import Annotated
 import httpx
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, Response
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
 from fastapi.responses import JSONResponse
 from sqlmodel import Session, select
 from ..deps.supabase import get_supabase_client
 
+from ..core.cache import CachedBody, job_cache_keys, make_etag, response_cache
+from ..core import job_queue
+from ..core.tracing import stage_span
 from ..deps.db import get_session
 from ..models import schemas
 from ..models.job_model import Job, JobStatus, SourceType
-from ..models.section_model import Section
-from ..models.summary_model import Summary
-from ..utils.arxiv_scraper import scrape_arxiv_data
-from ..tasks import process_pdf_task
+from ..utils.arxiv_scraper import parse_arxiv_ref, scrape_arxiv_batch, scrape_arxiv_data
 from ..utils.pdf_parser import compress_pdf
-from sqlalchemy import delete
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +43,47 @@ def _env_value(key: str) -> str | None:
 
 
 router = APIRouter()
+# Finished and failed jobs never change again (only deletion), so their
+# responses can be cached and revalidated with ETags.
+TERMINAL_STATUSES = {JobStatus.done, JobStatus.error}
+TERMINAL_CACHE_CONTROL = os.getenv("JOB_CACHE_CONTROL", "public, max-age=60")
 SessionDep = Annotated[Session, Depends(get_session)]
-supabase = get_supabase_client()
+
+
+def _storage_client():
+    """Supabase client, or None when storage is not configured."""
+    try:
+        return get_supabase_client()
+    except ValueError:
+        return None
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def cached_json_response(
+    cached: CachedBody, request: Request, cache_control: str
+) -> Response:
+    """Serve a pre-serialized body, or 304 when the client's ETag matches."""
+    headers = {"ETag": cached.etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+def job_json_response(job: Job, key: str, body: bytes, request: Request) -> Response:
+    """Respond with `body`, caching it first if the job can no longer change."""
+    if job.status in TERMINAL_STATUSES:
+        return cached_json_response(
+            response_cache.set(key, body), request, TERMINAL_CACHE_CONTROL
+        )
+    return cached_json_response(CachedBody(body, make_etag(body)), request, "no-cache")
 
 
 def error_response(status_code: int, code: str, message: str) -> JSONResponse:
@@ -56,7 +106,9 @@ def error_response(status_code: int, code: str, message: str) -> JSONResponse:
 async def read_jobs(
     session: SessionDep, offset: int = 0, limit: Annotated[int, Query(le=100)] = 100
 ) -> list[schemas.JobStatusResponse]:
-    jobs = session.exec(select(Job).offset(offset).limit(limit)).all()
+    jobs = session.exec(
+        select(Job).where(Job.deleted_at.is_(None)).offset(offset).limit(limit)
+    ).all()
     return [
         schemas.JobStatusResponse(
             id=job.id,
@@ -88,26 +140,43 @@ async def read_jobs(
         }
     },
 )
-async def read_job(job_id: str, session: SessionDep) -> schemas.JobResultsResponse:
+async def read_job(
+    job_id: uuid.UUID, request: Request, session: SessionDep
+) -> schemas.JobResultsResponse:
+    results_key, _ = job_cache_keys(job_id)
+    cached = response_cache.get(results_key)
+    if cached:
+        return cached_json_response(cached, request, TERMINAL_CACHE_CONTROL)
+
     job = session.get(Job, job_id)
-    if not job:
+    if not job or job.deleted_at is not None:
         return error_response(404, "JOB_NOT_FOUND", "Job not found")
     if job.status == JobStatus.done:
-        return {
-            "status": "done",
-            "summary": job.summary or "",
-            "flashcards": json.loads(job.flashcards) if job.flashcards else [],
-            "quiz": json.loads(job.quiz) if job.quiz else [],
-        }
+        # flashcards/quiz are stored as JSON text: splice them in as-is
+        # instead of decoding and re-encoding on every read.
+        body = (
+            '{"status":"done","summary":'
+            + json.dumps(job.summary or "")
+            + ',"flashcards":'
+            + (job.flashcards or "[]")
+            + ',"quiz":'
+            + (job.quiz or "[]")
+            + "}"
+        ).encode()
     else:
-        return schemas.JobResultsNotReady(
-            status=job.status.value,
-            message=(
-                "Results are not ready yet."
-                if job.status != JobStatus.error
-                else job.error_message or "An error occurred."
-            ),
+        body = (
+            schemas.JobResultsNotReady(
+                status=job.status.value,
+                message=(
+                    "Results are not ready yet."
+                    if job.status != JobStatus.error
+                    else job.error_message or "An error occurred."
+                ),
+            )
+            .model_dump_json()
+            .encode()
         )
+    return job_json_response(job, results_key, body, request)
 
 
 @router.get(
@@ -128,19 +197,29 @@ async def read_job(job_id: str, session: SessionDep) -> schemas.JobResultsRespon
     },
 )
 async def read_job_status(
-    job_id: str, session: SessionDep
+    job_id: uuid.UUID, request: Request, session: SessionDep
 ) -> schemas.JobStatusResponse:
+    _, status_key = job_cache_keys(job_id)
+    cached = response_cache.get(status_key)
+    if cached:
+        return cached_json_response(cached, request, TERMINAL_CACHE_CONTROL)
+
     job = session.get(Job, job_id)
-    if not job:
+    if not job or job.deleted_at is not None:
         return error_response(404, "JOB_NOT_FOUND", "Job not found")
-    return {
-        "id": job.id,
-        "status": job.status,
-        "progress": job.progress,
-        "error_message": job.error_message,
-        "created_at": job.created_at,
-        "updated_at": job.updated_at,
-    }
+    body = (
+        schemas.JobStatusResponse(
+            id=job.id,
+            status=job.status,
+            progress=job.progress,
+            error_message=job.error_message,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+        )
+        .model_dump_json()
+        .encode()
+    )
+    return job_json_response(job, status_key, body, request)
 
 
 @router.delete(
@@ -159,28 +238,18 @@ async def read_job_status(
         }
     },
 )
-async def delete_job(job_id: str, session: SessionDep) -> Response:
+async def delete_job(job_id: uuid.UUID, session: SessionDep) -> Response:
     job = session.get(Job, job_id)
-    if not job:
+    if not job or job.deleted_at is not None:
         return error_response(404, "JOB_NOT_FOUND", "Job not found")
 
-    # Delete summaries tied to this job's sections, then sections.
-    section_ids = list(session.exec(select(Section.id).where(Section.job_id == job_id)))
-    if section_ids:
-        session.exec(delete(Summary).where(Summary.section_id.in_(section_ids)))
-    session.exec(delete(Section).where(Section.job_id == job_id))
-
-    # Delete stored PDF if present and in our bucket
-    if supabase and job.source_url and "paper-uploads" in job.source_url:
-        try:
-            # source_url is public URL; extract path after bucket name
-            path_part = job.source_url.split("paper-uploads/")[-1]
-            supabase.storage.from_("paper-uploads").remove([path_part])
-        except Exception as exc:  # pragma: no cover - best-effort cleanup
-            logger.warning("Failed to remove file from Supabase: %s", exc)
-
-    session.delete(job)
+    # Soft delete: a single-row UPDATE here, while purge_job removes sections,
+    # summaries and the stored PDF in batches outside the request.
+    job.deleted_at = datetime.now(timezone.utc)
+    session.add(job)
     session.commit()
+    response_cache.invalidate(*job_cache_keys(job_id))
+    job_queue.enqueue_purge(str(job_id))
     return Response(status_code=204)
 
 
@@ -196,11 +265,13 @@ async def create_job_file(
     owner_user_id: str | None = None,
 ) -> schemas.JobCreateResponse:
 
+    supabase = _storage_client()
     if not supabase:
         raise HTTPException(
             status_code=500, detail="Supabase client not configured properly."
         )
-    file_content = await file.read()
+    with stage_span("http.read_upload"):
+        file_content = await file.read()
     file_content = compress_pdf(file_content)
 
     file_ext = file.filename.split(".")[-1] if "." in file.filename else "pdf"
@@ -209,13 +280,14 @@ async def create_job_file(
 
     try:
         # 3. Upload to Supabase Storage
-        supabase.storage.from_(bucket_name).upload(
-            path=file_path,
-            file=file_content,
-            file_options={"content-type": "application/pdf"},
-        )
+        with stage_span("storage.upload", **{"pdf.bytes": len(file_content)}):
+            supabase.storage.from_(bucket_name).upload(
+                path=file_path,
+                file=file_content,
+                file_options={"content-type": "application/pdf"},
+            )
 
-        public_url = supabase.storage.from_(bucket_name).get_public_url(file_path)
+            public_url = supabase.storage.from_(bucket_name).get_public_url(file_path)
 
     except Exception as e:
         # Log the specific error in production
@@ -229,12 +301,14 @@ async def create_job_file(
         status=JobStatus.queued,
         progress=0,
     )
-    session.add(new_job)
-    session.commit()
-    session.refresh(new_job)
+    with stage_span("db.insert_job"):
+        session.add(new_job)
+        session.commit()
+        session.refresh(new_job)
 
     # Kick off async processing after job record is persisted
-    process_pdf_task.delay(str(new_job.id))
+    with stage_span("queue.enqueue", **{"job.id": str(new_job.id)}):
+        job_queue.enqueue_jobs([str(new_job.id)])
 
     return schemas.JobCreateResponse(
         job_id=new_job.id,
@@ -254,15 +328,17 @@ async def create_job_link(
 ) -> schemas.JobCreateResponse:
     try:
 
-        data = scrape_arxiv_data(str(payload.url))
+        with stage_span("arxiv.lookup"):
+            data = scrape_arxiv_data(str(payload.url))
         final_source_url = data["pdf_url"]
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     try:
         async with httpx.AsyncClient() as client:
             # follow_redirects is crucial for arXiv links
-            response = await client.get(final_source_url, follow_redirects=True)
-            response.raise_for_status()
+            with stage_span("http.download_pdf"):
+                response = await client.get(final_source_url, follow_redirects=True)
+                response.raise_for_status()
             file_content = response.content
             file_content = compress_pdf(file_content)
 
@@ -273,6 +349,7 @@ async def create_job_link(
         )
 
     # 3. Upload to Supabase (Unified Storage)
+    supabase = _storage_client()
     if not supabase:
         raise HTTPException(status_code=503, detail="Storage not configured")
 
@@ -282,13 +359,14 @@ async def create_job_link(
     file_path = f"uploads/{owner_id}/{file_name}"
     bucket_name = "paper-uploads"
 
-    supabase.storage.from_(bucket_name).upload(
-        path=file_path,
-        file=file_content,
-        file_options={"content-type": "application/pdf"},
-    )
+    with stage_span("storage.upload", **{"pdf.bytes": len(file_content)}):
+        supabase.storage.from_(bucket_name).upload(
+            path=file_path,
+            file=file_content,
+            file_options={"content-type": "application/pdf"},
+        )
 
-    stored_url = supabase.storage.from_(bucket_name).get_public_url(file_path)
+        stored_url = supabase.storage.from_(bucket_name).get_public_url(file_path)
 
     new_job = Job(
         owner_user_id=payload.owner_user_id or "anonymous",
@@ -298,14 +376,136 @@ async def create_job_link(
         progress=0,
     )
 
-    session.add(new_job)
-    session.commit()
-    session.refresh(new_job)
+    with stage_span("db.insert_job"):
+        session.add(new_job)
+        session.commit()
+        session.refresh(new_job)
 
-    process_pdf_task.delay(str(new_job.id))
+    with stage_span("queue.enqueue", **{"job.id": str(new_job.id)}):
+        job_queue.enqueue_jobs([str(new_job.id)])
 
     return schemas.JobCreateResponse(
         job_id=new_job.id,
         status="queued",
         created_at=new_job.created_at,
     )
+
+
+@router.post(
+    "/v1/jobs/batch",
+    tags=["jobs"],
+    status_code=201,
+    response_model=schemas.BatchJobCreateResponse,
+    responses={502: {"model": schemas.ErrorResponse}},
+)
+async def create_jobs_batch(
+    payload: schemas.BatchLinkCreateRequest, session: SessionDep
+) -> schemas.BatchJobCreateResponse:
+    """Queue one job per distinct arXiv paper in a reading list.
+
+    Metadata is fetched with batched `id_list` queries, jobs are written with a
+    single multi-row INSERT and enqueued together. The PDF download happens in
+    the worker, so the request cost doesn't grow with paper size.
+    """
+    errors: list[schemas.BatchItemError] = []
+    refs: list[tuple[str, str]] = []
+    for value in payload.urls:
+        paper_id = parse_arxiv_ref(value)
+        if paper_id:
+            refs.append((value, paper_id))
+        else:
+            errors.append(
+                schemas.BatchItemError(
+                    input=value, code="INVALID_ARXIV_URL", message="Invalid arXiv URL"
+                )
+            )
+
+    try:
+        with stage_span("arxiv.lookup_batch", **{"arxiv.ids": len(refs)}):
+            # The arxiv client is blocking and rate-limited; keep it off the loop.
+            found, missing = await run_in_threadpool(
+                scrape_arxiv_batch, [paper_id for _, paper_id in refs]
+            )
+    except Exception as exc:
+        logger.error(f"arXiv batch lookup failed: {exc}")
+        return error_response(502, "ARXIV_UNAVAILABLE", "Failed to query arXiv")
+
+    missing_ids = set(missing)
+    owner_id = payload.owner_user_id or "anonymous"
+    jobs_by_paper: dict[str, Job] = {}
+    created: list[schemas.BatchJobCreated] = []
+    for value, paper_id in refs:
+        if paper_id in missing_ids:
+            errors.append(
+                schemas.BatchItemError(
+                    input=value,
+                    code="PAPER_NOT_FOUND",
+                    message="Paper not found on arXiv",
+                )
+            )
+            continue
+        job = jobs_by_paper.get(paper_id)
+        if job is None:
+            job = Job(
+                owner_user_id=owner_id,
+                source_type=SourceType.url,
+                source_url=found[paper_id]["pdf_url"],
+                status=JobStatus.queued,
+                progress=0,
+            )
+            jobs_by_paper[paper_id] = job
+        created.append(
+            schemas.BatchJobCreated(
+                input=value, job_id=job.id, arxiv_id=paper_id, status="queued"
+            )
+        )
+
+    new_jobs = list(jobs_by_paper.values())
+    if new_jobs:
+        with stage_span("db.insert_jobs", **{"jobs": len(new_jobs)}):
+            session.exec(insert(Job), params=[job.model_dump() for job in new_jobs])
+            session.commit()
+
+        with stage_span("queue.enqueue_batch", **{"jobs": len(new_jobs)}):
+            job_queue.enqueue_jobs([str(job.id) for job in new_jobs])
+
+    return schemas.BatchJobCreateResponse(jobs=created, errors=errors)
+
+
+@router.post(
+    "/v1/jobs/status:batch",
+    tags=["jobs"],
+    status_code=200,
+    response_model=schemas.BatchStatusResponse,
+)
+async def read_jobs_status_batch(
+    payload: schemas.BatchStatusRequest, session: SessionDep
+) -> schemas.BatchStatusResponse:
+    # Select only the status columns so large summary/quiz text isn't loaded.
+    rows = session.exec(
+        select(
+            Job.id,
+            Job.status,
+            Job.progress,
+            Job.error_message,
+            Job.created_at,
+            Job.updated_at,
+        ).where(Job.id.in_(payload.job_ids), Job.deleted_at.is_(None))
+    ).all()
+    found = {row.id for row in rows}
+    return schemas.BatchStatusResponse(
+        jobs=[
+            schemas.JobStatusResponse(
+                id=row.id,
+                status=row.status,
+                progress=row.progress,
+                error_message=row.error_message,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+            for row in rows
+        ],
+        not_found=[
+            job_id for job_id in dict.fromkeys(payload.job_ids) if job_id not in found
+        ],
+    )
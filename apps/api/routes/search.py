@@ -0,0 +1,107 @@
+import os
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from ..core.embeddings import embed_query, get_embedding_provider
+from ..deps.db import get_session
+from ..models import schemas
+from ..models.job_model import Job
+from ..models.section_model import Section
+from .jobs import error_response
+
+router = APIRouter()
+SessionDep = Annotated[Session, Depends(get_session)]
+
+SNIPPET_CHARS = 300
+# Cap on index tuples an iterative HNSW scan visits looking for rows that pass
+# the deleted/owner filters (pgvector's own default).
+SEARCH_MAX_SCAN_TUPLES = int(os.getenv("SEARCH_MAX_SCAN_TUPLES", "20000"))
+
+# Whether the installed pgvector has iterative index scans (0.8.0+); looked up
+# on the first search.
+_iterative_scan: bool | None = None
+
+
+def _iterative_scan_supported(session: Session) -> bool:
+    global _iterative_scan
+    if _iterative_scan is None:
+        version = session.exec(
+            text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar()
+        major, minor = (int(part) for part in version.split(".")[:2])
+        _iterative_scan = (major, minor) >= (0, 8)
+    return _iterative_scan
+
+
+@router.get(
+    "/v1/search",
+    tags=["search"],
+    status_code=200,
+    response_model=schemas.SearchResponse,
+    responses={503: {"model": schemas.ErrorResponse}},
+)
+def search_sections(
+    session: SessionDep,
+    q: Annotated[str, Query(min_length=1, max_length=2000)],
+    k: Annotated[int, Query(ge=1, le=50)] = 10,
+    owner_user_id: str | None = None,
+) -> schemas.SearchResponse:
+    """Semantic search over embedded sections, nearest first.
+
+    Declared as a sync endpoint so the embedding call and the DB query run
+    in FastAPI's threadpool instead of blocking the event loop.
+    """
+    try:
+        query_vector = embed_query(get_embedding_provider(), q)
+    except ValueError as exc:
+        return error_response(503, "EMBEDDINGS_UNAVAILABLE", str(exc))
+
+    distance = Section.embeddings.cosine_distance(query_vector)
+    # HNSW applies the WHERE clause after the index scan, which by default
+    # stops after ef_search candidates. Iterative scans keep going until k
+    # rows pass the filters; without them an owner's sections are ranked
+    # exactly, since they may be far too sparse among the first candidates.
+    iterative = _iterative_scan_supported(session)
+    order = distance if iterative or not owner_user_id else distance + 0
+    statement = (
+        select(
+            Section.id,
+            Section.job_id,
+            Section.title,
+            Section.order,
+            Section.content,
+            distance.label("distance"),
+        )
+        # Sections of soft-deleted jobs stay until purge_job removes them.
+        .join(Job, Job.id == Section.job_id)
+        .where(Section.embeddings.is_not(None), Job.deleted_at.is_(None))
+        .order_by(order)
+        .limit(k)
+    )
+    if owner_user_id:
+        statement = statement.where(Job.owner_user_id == owner_user_id)
+
+    session.exec(text(f"SET LOCAL hnsw.ef_search = {max(40, k * 4)}"))
+    if iterative:
+        session.exec(text("SET LOCAL hnsw.iterative_scan = relaxed_order"))
+        session.exec(text(f"SET LOCAL hnsw.max_scan_tuples = {SEARCH_MAX_SCAN_TUPLES}"))
+    # relaxed_order may return neighbours slightly out of order.
+    rows = sorted(session.exec(statement).all(), key=lambda row: row.distance)
+
+    return schemas.SearchResponse(
+        query=q,
+        results=[
+            schemas.SearchHit(
+                section_id=row.id,
+                job_id=row.job_id,
+                title=row.title,
+                order=row.order,
+                snippet=(row.content or "")[:SNIPPET_CHARS],
+                score=1.0 - float(row.distance),
+            )
+            for row in rows
+        ],
+    )
@@ -1,100 +1,402 @@
 # apps/api/tasks.py
+import json
 import logging
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import httpx
+from celery import chord
+from celery.signals import task_prerun
+from sqlalchemy import text, update
 from sqlmodel import Session, select
+from .core.cache import job_cache_keys, response_cache
 from .core.celery_app import celery_app
+from .core.metrics import STAGE_DURATION
+from .core.tracing import queue_wait_ms, stage_span
 from .deps.db import engine
 from .models.job_model import Job, JobStatus, SourceType
+from .models.job_stage_model import JobStage
 from .models.section_model import Section
 from .utils.pdf_parser import extract_sections_from_pdf
 from .deps.supabase import get_supabase_client
 from .models.summary_model import Summary
-from .core.llm import generate_section_summary
+from .core.llm import (
+    MODEL_NAME,
+    SectionAnalysis,
+    combine_section_analyses,
+    generate_section_summary,
+    generate_study_material,
+)
+from .core.embeddings import embed_documents, get_embedding_provider
 
 logger = logging.getLogger(__name__)
-supabase = get_supabase_client()
+
+# Max number of summaries merged by a single reduce prompt, and how many of
+# those prompts may be in flight at once within a level.
+REDUCE_FAN_IN = int(os.getenv("REDUCE_FAN_IN", "8"))
+REDUCE_CONCURRENCY = int(os.getenv("REDUCE_CONCURRENCY", "4"))
+
+PDF_DOWNLOAD_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_TIMEOUT", "60"))
+
+# Tasks whose first argument is a job id; their queue wait is recorded per job.
+JOB_TASKS = {"process_pdf", "summarize_paper", "reduce_paper", "embed_sections"}
+
+BUCKET_NAME = "paper-uploads"
+
+# Garbage collection: rows deleted per statement, when queued/processing jobs
+# count as stuck, how long failed jobs are kept, and how old an unreferenced
+# upload must be before it is treated as orphaned (uploads land in storage
+# shortly before their Job row is committed).
+GC_BATCH_SIZE = int(os.getenv("GC_BATCH_SIZE", "500"))
+STALE_JOB_TIMEOUT_MINUTES = int(os.getenv("STALE_JOB_TIMEOUT_MINUTES", "360"))
+ERROR_JOB_RETENTION_DAYS = int(os.getenv("ERROR_JOB_RETENTION_DAYS", "30"))
+ORPHAN_GRACE_MINUTES = int(os.getenv("ORPHAN_GRACE_MINUTES", "60"))
+# Soft-deleted jobs older than this are assumed to have lost their purge task.
+PURGE_RETRY_AFTER = timedelta(minutes=10)
+STORAGE_LIST_LIMIT = 1000
+
+# One round trip per batch: summaries go with their sections in the same
+# statement, so no section ids are pulled into Python.
+_PURGE_SECTIONS_SQL = text("""
+    WITH batch AS (
+        SELECT id FROM section WHERE job_id = :job_id LIMIT :limit
+    ), removed_summaries AS (
+        DELETE FROM summary WHERE section_id IN (SELECT id FROM batch)
+    )
+    DELETE FROM section WHERE id IN (SELECT id FROM batch)
+    """)
+
+
+def public_urls(bucket, path: str) -> list[str]:
+    """Every form of `path`'s public URL a job's source_url may hold.
+
+    Older storage3 releases appended an empty query string ("...pdf?").
+    """
+    url = bucket.get_public_url(path).rstrip("?")
+    return [url, f"{url}?"]
+
+
+def storage_path(source_url: str | None) -> str | None:
+    """Object path inside BUCKET_NAME for an uploaded PDF, None for external URLs."""
+    if not source_url or f"{BUCKET_NAME}/" not in source_url:
+        return None
+    return source_url.split(f"{BUCKET_NAME}/")[-1]
 
 
 def update_job_progress(
     job_id: str, progress: int, status: JobStatus = JobStatus.processing
-):
-    """Helper to update job progress safely."""
+) -> bool:
+    """Helper to update job progress safely.
+
+    Failed jobs are final (sweep_jobs may time a job out while its messages
+    are still queued), so they are never moved back. Returns False when the
+    job is gone or failed and the caller should stop.
+    """
+    with Session(engine) as session:
+        updated = session.exec(
+            update(Job)
+            .where(Job.id == job_id, Job.status != JobStatus.error)
+            .values(progress=progress, status=status)
+        ).rowcount
+        session.commit()
+    if updated:
+        logger.info(f"Job {job_id} updated: {progress}% - {status}")
+    return bool(updated)
+
+
+def mark_job_error(job_id: str, message: str):
+    """Helper to flag a job as failed with a user-visible message."""
     with Session(engine) as session:
         job = session.get(Job, job_id)
         if job:
-            job.progress = progress
-            job.status = status
+            job.status = JobStatus.error
+            job.error_message = message
             session.add(job)
             session.commit()
-            logger.info(f"Job {job_id} updated: {progress}% - {status}")
+    # Drop any response cached while the job was still readable.
+    response_cache.invalidate(*job_cache_keys(job_id))
+
+
+def record_stage(job_id, stage: str, duration_ms: float, span=None):
+    """Persist one stage duration. Best-effort: never fails the pipeline."""
+    trace_id = None
+    if span is not None and span.get_span_context().is_valid:
+        trace_id = format(span.get_span_context().trace_id, "032x")
+    try:
+        with Session(engine) as session:
+            session.add(
+                JobStage(
+                    job_id=job_id,
+                    stage=stage,
+                    duration_ms=duration_ms,
+                    trace_id=trace_id,
+                )
+            )
+            session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to record stage {stage} for job {job_id}: {e}")
+
+
+@contextmanager
+def timed_stage(job_id, stage: str, **attributes):
+    """Trace a pipeline stage and store its duration in the jobstage table."""
+    started = time.perf_counter()
+    with stage_span(stage, **{"job.id": str(job_id)}, **attributes) as span:
+        try:
+            yield span
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            span.set_attribute("duration_ms", duration_ms)
+            STAGE_DURATION.labels(stage).observe(duration_ms / 1000)
+            record_stage(job_id, stage, duration_ms, span)
+
+
+@task_prerun.connect
+def _record_queue_wait(task=None, args=None, **_):
+    if task is None or task.name not in JOB_TASKS or not args:
+        return
+    wait = queue_wait_ms(task.request)
+    if wait is not None:
+        with stage_span(f"queue.{task.name}") as span:
+            record_stage(args[0], f"queue.{task.name}", wait, span)
+
+
+@celery_app.task(name="summarize_section")
+def summarize_section_task(section_id: str):
+    """Map step: summarize one section, reusing an existing Summary row.
+
+    Never raises: a failed header task would stop the chord from running
+    reduce_paper, which works with whatever summaries exist.
+    """
+    try:
+        summarize_section(section_id)
+    except Exception as e:
+        logger.error(f"Failed to summarize section {section_id}: {e}")
+
+
+def summarize_section(section_id: str) -> None:
+    # Read in a short session: no connection is held during the LLM call,
+    # so a section in flight uses one connection at a time.
+    with Session(engine) as session:
+        cached = session.exec(
+            select(Summary.id).where(Summary.section_id == section_id)
+        ).first()
+        if cached:
+            return
+
+        section = session.get(Section, section_id)
+        if not section or not section.content:
+            return
+        section_pk, job_id = section.id, section.job_id
+        order, content = section.order, section.content
+
+    # Appel LLM (peut prendre 2-5s par section)
+    with timed_stage(job_id, "llm.summarize_section", section_order=order):
+        analysis, usage = generate_section_summary(content)
+
+    with Session(engine) as session:
+        session.add(
+            Summary(
+                section_id=section_pk,
+                summary_text=analysis.summary,
+                key_claims=analysis.claims,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                model_used=MODEL_NAME,
+            )
+        )
+        session.commit()
+
+
+def load_section_ids(job_id: str) -> list:
+    """Section ids in reading order; flags the job as failed if there are none."""
+    with Session(engine) as session:
+        section_ids = session.exec(
+            select(Section.id).where(Section.job_id == job_id).order_by(Section.order)
+        ).all()
+
+    if not section_ids:
+        logger.warning(f"No sections found for job {job_id}")
+        mark_job_error(job_id, "No text could be extracted from the PDF.")
+    return section_ids
 
 
 @celery_app.task(name="summarize_paper")
 def summarize_paper_task(job_id: str):
+    """Fan out one summarize_section task per section, then reduce."""
     logger.info(f"🧠 Summarizing Job {job_id}")
 
+    section_ids = load_section_ids(job_id)
+    if not section_ids:
+        return
+
+    chord(summarize_section_task.si(str(sid)) for sid in section_ids)(
+        reduce_paper_task.si(job_id)
+    )
+
+
+def reduce_analyses(parts: List[SectionAnalysis]) -> SectionAnalysis:
+    """Combine analyses level by level with at most REDUCE_FAN_IN per call.
+
+    Groups within a level are independent, so they run concurrently.
+    """
+    while len(parts) > 1:
+        groups = [
+            parts[i : i + REDUCE_FAN_IN] for i in range(0, len(parts), REDUCE_FAN_IN)
+        ]
+        with ThreadPoolExecutor(max_workers=REDUCE_CONCURRENCY) as pool:
+            parts = list(
+                pool.map(
+                    lambda g: g[0] if len(g) == 1 else combine_section_analyses(g),
+                    groups,
+                )
+            )
+    return parts[0]
+
+
+@celery_app.task(name="reduce_paper")
+def reduce_paper_task(job_id: str):
+    """Reduce step: build paper summary, flashcards and quiz from section summaries."""
+    logger.info(f"🧩 Reducing summaries for Job {job_id}")
+
+    try:
+        with timed_stage(job_id, "db.load_summaries"), Session(engine) as session:
+            job = session.get(Job, job_id)
+            if not job or job.status == JobStatus.error:
+                logger.warning(f"Skipping reduce for Job {job_id}: already failed")
+                return
+            rows = session.exec(
+                select(Summary)
+                .join(Section, Section.id == Summary.section_id)
+                .where(Section.job_id == job_id)
+                .order_by(Section.order)
+            ).all()
+            parts = [
+                SectionAnalysis(summary=r.summary_text, claims=r.key_claims or [])
+                for r in rows
+            ]
+
+        if not parts:
+            raise ValueError("No section could be summarized.")
+
+        with timed_stage(job_id, "llm.reduce", parts=len(parts)):
+            paper = reduce_analyses(parts)
+        with timed_stage(job_id, "llm.study_material"):
+            study = generate_study_material(paper)
+
+        with timed_stage(job_id, "db.save_results"), Session(engine) as session:
+            # Conditional so a job timed out by sweep_jobs meanwhile stays failed.
+            session.exec(
+                update(Job)
+                .where(Job.id == job_id, Job.status != JobStatus.error)
+                .values(
+                    summary=paper.summary,
+                    flashcards=json.dumps([c.model_dump() for c in study.flashcards]),
+                    quiz=json.dumps([q.model_dump() for q in study.quiz]),
+                    status=JobStatus.done,
+                    progress=100,
+                )
+            )
+            session.commit()
+        response_cache.invalidate(*job_cache_keys(job_id))
+
+        logger.info(f"✅ Summarization complete for Job {job_id}")
+
+    except Exception as e:
+        logger.error(f"❌ Failed to reduce Job {job_id}: {e}")
+        mark_job_error(job_id, str(e))
+
+
+@celery_app.task(name="embed_sections")
+def embed_sections_task(job_id: str):
+    logger.info(f"🔢 Embedding sections for Job {job_id}")
+
     with Session(engine) as session:
-        # 1. Récupérer toutes les sections du job
-        # (Attention : il faut importer 'select' de sqlmodel)
         sections = session.exec(
-            select(Section).where(Section.job_id == job_id).order_by(Section.order)
+            select(Section)
+            .where(Section.job_id == job_id, Section.embeddings.is_(None))
+            .order_by(Section.order)
         ).all()
 
         if not sections:
-            logger.warning(f"No sections found for job {job_id}")
+            logger.warning(f"No sections to embed for job {job_id}")
             return
 
-        # 2. Boucler et résumer
-        for section in sections:
-            try:
-                # Appel LLM (peut prendre 2-5s par section)
-                analysis = generate_section_summary(section.content)
-
-                # Sauvegarde
-                summary = Summary(
-                    section_id=section.id,
-                    summary_text=analysis.summary,
-                    key_claims=analysis.claims,
-                    model_used="gemini-1.5-flash",
-                )
-                session.add(summary)
-                session.commit()
+        provider = get_embedding_provider()
+        texts = [f"{s.title or ''}\n{s.content or ''}" for s in sections]
+        with timed_stage(job_id, "embed.sections", sections=len(sections)):
+            vectors = embed_documents(provider, texts)
 
-            except Exception as e:
-                logger.error(f"Failed to summarize section {section.id}: {e}")
-                # On continue quand même pour les autres sections
-                continue
+        with timed_stage(job_id, "db.save_embeddings"):
+            for section, vector in zip(sections, vectors):
+                section.embeddings = vector
+                session.add(section)
+            session.commit()
 
-        # 3. Mettre à jour le statut global du Job si nécessaire
-        # (Optionnel : créer un statut 'SUMMARIZED' ou rester sur 'DONE')
+    logger.info(f"✅ Embedded {len(sections)} sections for Job {job_id}")
 
-    logger.info(f"✅ Summarization complete for Job {job_id}")
 
+def save_sections(job_id: str, sections_data: List[dict]):
+    """Persist parsed sections for a job in one transaction."""
+    with Session(engine) as session:
+        # Re-fetch job to ensure session is fresh
+        job = session.get(Job, job_id)
 
-@celery_app.task(name="process_pdf")
-def process_pdf_task(job_id: str):
+        for sec in sections_data:
+            new_section = Section(
+                job_id=job.id,
+                title=sec["title"],
+                content=sec["content"],
+                order=sec["order"],
+            )
+            session.add(new_section)
+
+        session.commit()
+
+
+def ingest_pdf(job_id: str) -> bool:
+    """Download, parse and store a job's PDF as sections.
+
+    Returns False when the job is gone or failed (already marked as error).
+    """
     logger.info(f"🚀 Starting Job {job_id}")
 
-    update_job_progress(job_id, 10)
+    if not update_job_progress(job_id, 10):
+        logger.warning(f"Skipping Job {job_id}: missing or already failed")
+        return False
 
     try:
         # Retrieve Job Data
         with Session(engine) as session:
             job = session.get(Job, job_id)
-            if not job:
-                return
+            if not job or job.deleted_at is not None:
+                return False
             source_url = job.source_url
             source_type = job.source_type
 
-        if "paper-uploads" in source_url:
-            # Simple hack to get path after bucket name
-            file_path = source_url.split("paper-uploads/")[-1]
+        file_path = storage_path(source_url)
+        if file_path:
             logger.info(f"Downloading file from path: {file_path}")
 
             # Download as bytes
-            res = supabase.storage.from_("paper-uploads").download(file_path)
+            with timed_stage(job_id, "storage.download"):
+                res = (
+                    get_supabase_client().storage.from_(BUCKET_NAME).download(file_path)
+                )
             file_bytes = res
+        else:
+            # Batch-submitted jobs point at the source PDF (e.g. arXiv) and
+            # are downloaded here rather than in the API request.
+            with timed_stage(job_id, "http.download_pdf"):
+                response = httpx.get(
+                    source_url, follow_redirects=True, timeout=PDF_DOWNLOAD_TIMEOUT
+                )
+                response.raise_for_status()
+            file_bytes = response.content
 
         if not file_bytes:
             raise ValueError("Could not download file content.")
@@ -102,37 +404,193 @@ def process_pdf_task(job_id: str):
         update_job_progress(job_id, 30)
 
         logger.info(f"Parsing PDF content for Job {job_id}...")
-        sections_data = extract_sections_from_pdf(file_bytes)
+        with timed_stage(job_id, "pdf.extract_sections", bytes=len(file_bytes)):
+            sections_data = extract_sections_from_pdf(file_bytes)
         update_job_progress(job_id, 60)
 
         logger.info(f"Saving {len(sections_data)} sections to DB...")
-        with Session(engine) as session:
-            # Re-fetch job to ensure session is fresh
-            job = session.get(Job, job_id)
+        with timed_stage(job_id, "db.save_sections", sections=len(sections_data)):
+            save_sections(job_id, sections_data)
+        logger.info(f"✅ Job {job_id} parsed. Triggering summarization...")
+        return update_job_progress(job_id, 70)
 
-            for sec in sections_data:
-                new_section = Section(
-                    job_id=job.id,
-                    title=sec["title"],
-                    content=sec["content"],
-                    order=sec["order"],
-                )
-                session.add(new_section)
+    except Exception as e:
+        logger.error(f"❌ Failed Job {job_id}: {e}")
+        mark_job_error(job_id, str(e))
+        return False
 
-            session.commit()
-        logger.info(f"✅ Job {job_id} parsed. Triggering summarization...")
+
+@celery_app.task(name="process_pdf")
+def process_pdf_task(job_id: str):
+    if ingest_pdf(job_id):
+        # reduce_paper_task marks the job done once summary/flashcards/quiz exist.
         summarize_paper_task.delay(job_id)
-        update_job_progress(job_id, 90, JobStatus.done)
+        embed_sections_task.delay(job_id)
 
-        update_job_progress(job_id, 100, JobStatus.done)
-        logger.info(f"✅ Job {job_id} completed successfully.")
 
-    except Exception as e:
-        logger.error(f"❌ Failed Job {job_id}: {e}")
+def run_pipeline(job_id: str, section_concurrency: int = 1):
+    """Run the whole pipeline for one job in this process (see worker.py).
+
+    Calls the task bodies (`.run`) directly instead of enqueueing them;
+    `task()` itself keeps per-task request state that is not thread-safe.
+    Sections are saved in a single transaction, so a job that already has
+    sections was parsed by an earlier attempt and goes straight to
+    summarization, which in turn reuses existing summaries.
+    """
+    with Session(engine) as session:
+        parsed = session.exec(
+            select(Section.id).where(Section.job_id == job_id).limit(1)
+        ).first()
+    if not parsed and not ingest_pdf(job_id):
+        return
+
+    section_ids = load_section_ids(job_id)
+    if not section_ids:
+        return
+    with ThreadPoolExecutor(max_workers=section_concurrency) as pool:
+        list(pool.map(summarize_section_task.run, [str(sid) for sid in section_ids]))
+    reduce_paper_task.run(job_id)
+    embed_sections_task.run(job_id)
+
+
+@celery_app.task(name="purge_job")
+def purge_job_task(job_id: str):
+    """Hard-delete a soft-deleted job: sections and summaries in batches,
+    then its stored PDF, then the job row (jobstage rows cascade)."""
+    with Session(engine) as session:
+        job = session.get(Job, job_id)
+        if not job:
+            return
+        if job.deleted_at is None:
+            logger.warning(f"Refusing to purge Job {job_id}: not deleted")
+            return
+        source_url = job.source_url
+
+    purged = 0
+    while True:
+        # Short transactions keep row locks brief on large jobs.
+        with engine.begin() as conn:
+            deleted = conn.execute(
+                _PURGE_SECTIONS_SQL, {"job_id": job_id, "limit": GC_BATCH_SIZE}
+            ).rowcount
+        purged += deleted
+        if deleted < GC_BATCH_SIZE:
+            break
+
+    file_path = storage_path(source_url)
+    if file_path:
+        try:
+            get_supabase_client().storage.from_(BUCKET_NAME).remove([file_path])
+        except Exception as e:
+            # Keep the job row so sweep_jobs retries the purge later.
+            logger.warning(f"Failed to remove {file_path} for Job {job_id}: {e}")
+            return
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM job WHERE id = :job_id"), {"job_id": job_id})
+    logger.info(f"🗑️ Purged Job {job_id} ({purged} sections)")
+
+
+def _sweep_orphaned_uploads(now: datetime) -> int:
+    """Remove uploads older than ORPHAN_GRACE_MINUTES that no job references."""
+    bucket = get_supabase_client().storage.from_(BUCKET_NAME)
+    cutoff = now - timedelta(minutes=ORPHAN_GRACE_MINUTES)
+
+    def list_all(path: str):
+        offset = 0
+        while True:
+            page = bucket.list(path, {"limit": STORAGE_LIST_LIMIT, "offset": offset})
+            yield from page
+            if len(page) < STORAGE_LIST_LIMIT:
+                return
+            offset += STORAGE_LIST_LIMIT
+
+    removed = 0
+    # Uploads live at uploads/<owner>/<file>; entries without an id are folders.
+    for folder in list(list_all("uploads")):
+        if folder.get("id"):
+            continue
+        prefix = f"uploads/{folder['name']}"
+        candidates = []
+        for obj in list_all(prefix):
+            created_at = obj.get("created_at")
+            if not obj.get("id") or not created_at:
+                continue
+            created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            if created < cutoff:
+                candidates.append(f"{prefix}/{obj['name']}")
+        if not candidates:
+            continue
+
+        # Jobs store the public URL of their upload: look up exactly those
+        # URLs so the source_url index is used instead of a LIKE scan.
+        urls = {url: path for path in candidates for url in public_urls(bucket, path)}
+        url_list = list(urls)
+        referenced = set()
         with Session(engine) as session:
-            job = session.get(Job, job_id)
-            if job:
-                job.status = JobStatus.error
-                job.error_message = str(e)
-                session.add(job)
-                session.commit()
+            for start in range(0, len(url_list), GC_BATCH_SIZE):
+                batch = url_list[start : start + GC_BATCH_SIZE]
+                referenced.update(
+                    urls[url]
+                    for url in session.exec(
+                        select(Job.source_url).where(Job.source_url.in_(batch))
+                    )
+                )
+        orphans = [path for path in candidates if path not in referenced]
+        for start in range(0, len(orphans), GC_BATCH_SIZE):
+            bucket.remove(orphans[start : start + GC_BATCH_SIZE])
+        removed += len(orphans)
+    return removed
+
+
+def sweep_jobs() -> List[str]:
+    """Periodic GC: fail stuck jobs, expire old failures and remove uploads
+    that no job points at. Returns the ids of jobs that need a purge."""
+    now = datetime.now(timezone.utc)
+
+    with Session(engine) as session:
+        stale = session.exec(
+            update(Job)
+            .where(
+                Job.status.in_([JobStatus.queued, JobStatus.processing]),
+                Job.updated_at < now - timedelta(minutes=STALE_JOB_TIMEOUT_MINUTES),
+                Job.deleted_at.is_(None),
+            )
+            .values(status=JobStatus.error, error_message="Job timed out.")
+            .returning(Job.id)
+        ).all()
+        expired = session.exec(
+            update(Job)
+            .where(
+                Job.status == JobStatus.error,
+                Job.updated_at < now - timedelta(days=ERROR_JOB_RETENTION_DAYS),
+                Job.deleted_at.is_(None),
+            )
+            .values(deleted_at=now)
+            .returning(Job.id)
+        ).all()
+        pending = session.exec(
+            select(Job.id).where(Job.deleted_at < now - PURGE_RETRY_AFTER)
+        ).all()
+        session.commit()
+
+    for (job_id,) in [*stale, *expired]:
+        response_cache.invalidate(*job_cache_keys(job_id))
+
+    try:
+        orphans = _sweep_orphaned_uploads(now)
+    except Exception as e:
+        logger.warning(f"Orphaned upload sweep failed: {e}")
+        orphans = 0
+
+    logger.info(
+        f"🧹 Sweep: {len(stale)} timed out, {len(expired)} expired, "
+        f"{len(pending)} purges retried, {orphans} orphaned uploads removed"
+    )
+    return [str(job_id) for (job_id,) in expired] + [str(j) for j in pending]
+
+
+@celery_app.task(name="sweep_jobs")
+def sweep_jobs_task():
+    for job_id in sweep_jobs():
+        purge_job_task.delay(job_id)
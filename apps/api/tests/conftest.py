@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine
+
+from ..core import job_queue
+from ..core.cache import response_cache
+from ..deps.db import get_session
+from ..main import app
+from ..models.job_model import Job
+
+
+@pytest.fixture
+def engine():
+    # Only the job table: the other tables use pgvector and need Postgres.
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Job.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def purged(monkeypatch):
+    """Job ids passed to enqueue_purge, instead of reaching Celery."""
+    job_ids = []
+    monkeypatch.setattr(job_queue, "enqueue_purge", job_ids.append)
+    return job_ids
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    """Job ids passed to enqueue_jobs, instead of reaching Celery."""
+    job_ids = []
+    monkeypatch.setattr(job_queue, "enqueue_jobs", job_ids.extend)
+    return job_ids
+
+
+@pytest.fixture
+def client(engine, purged, enqueued, monkeypatch):
+    # Keep the response cache in-process; tests must not need Redis.
+    monkeypatch.setattr(response_cache, "_client", lambda: None)
+    response_cache._lru.clear()
+
+    def override_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    response_cache._lru.clear()
@@ -0,0 +1,29 @@
+import pytest
+
+from ..utils.arxiv_scraper import parse_arxiv_ref
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2101.00001",
+        "2101.00001v2",
+        " 2101.00001v12 ",
+        "https://arxiv.org/abs/2101.00001",
+        "https://arxiv.org/abs/2101.00001v3",
+        "https://arxiv.org/pdf/2101.00001v1",
+    ],
+)
+def test_refs_resolve_to_the_unversioned_id(value):
+    assert parse_arxiv_ref(value) == "2101.00001"
+
+
+def test_five_digit_ids():
+    assert parse_arxiv_ref("2312.12345v1") == "2312.12345"
+
+
+@pytest.mark.parametrize(
+    "value", ["", "not a paper", "2101.001", "https://example.com/2101.00001x"]
+)
+def test_invalid_refs(value):
+    assert parse_arxiv_ref(value) is None
@@ -0,0 +1,130 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from ..models.job_model import Job, JobStatus, SourceType
+from ..routes import jobs as jobs_routes
+
+KNOWN_PAPERS = {"2101.00001", "2202.00002"}
+
+
+@pytest.fixture
+def arxiv_lookups(monkeypatch):
+    """Stub the arXiv API: KNOWN_PAPERS exist, every other id is missing."""
+    lookups = []
+
+    def scrape_arxiv_batch(paper_ids):
+        lookups.append(list(paper_ids))
+        found = {
+            paper_id: {"pdf_url": f"https://arxiv.org/pdf/{paper_id}"}
+            for paper_id in paper_ids
+            if paper_id in KNOWN_PAPERS
+        }
+        missing = [paper_id for paper_id in paper_ids if paper_id not in found]
+        return found, missing
+
+    monkeypatch.setattr(jobs_routes, "scrape_arxiv_batch", scrape_arxiv_batch)
+    return lookups
+
+
+def create_batch(client, urls, **fields):
+    return client.post("/v1/jobs/batch", json={"urls": urls, **fields})
+
+
+def test_bare_and_versioned_ids_create_jobs(client, session, arxiv_lookups, enqueued):
+    response = create_batch(client, ["2101.00001", "2202.00002v3"], owner_user_id="u1")
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["errors"] == []
+    assert [job["arxiv_id"] for job in body["jobs"]] == ["2101.00001", "2202.00002"]
+    assert sorted(enqueued) == sorted(job["job_id"] for job in body["jobs"])
+    job = session.get(Job, uuid.UUID(body["jobs"][1]["job_id"]))
+    assert job.owner_user_id == "u1"
+    assert job.status == JobStatus.queued
+    assert job.source_url == "https://arxiv.org/pdf/2202.00002"
+
+
+def test_same_paper_twice_returns_one_job(client, session, arxiv_lookups, enqueued):
+    urls = ["2101.00001", "https://arxiv.org/abs/2101.00001v2"]
+
+    body = create_batch(client, urls).json()
+
+    assert [job["input"] for job in body["jobs"]] == urls
+    assert len({job["job_id"] for job in body["jobs"]}) == 1
+    assert len(enqueued) == 1
+    assert session.get(Job, uuid.UUID(enqueued[0])).owner_user_id == "anonymous"
+
+
+def test_invalid_and_missing_papers_are_reported(client, arxiv_lookups, enqueued):
+    body = create_batch(client, ["not a paper", "2303.99999", "2101.00001"]).json()
+
+    assert body["errors"] == [
+        {
+            "input": "not a paper",
+            "code": "INVALID_ARXIV_URL",
+            "message": "Invalid arXiv URL",
+        },
+        {
+            "input": "2303.99999",
+            "code": "PAPER_NOT_FOUND",
+            "message": "Paper not found on arXiv",
+        },
+    ]
+    assert [job["input"] for job in body["jobs"]] == ["2101.00001"]
+    assert arxiv_lookups == [["2303.99999", "2101.00001"]]
+    assert len(enqueued) == 1
+
+
+def test_nothing_valid_creates_no_jobs(client, arxiv_lookups, enqueued):
+    body = create_batch(client, ["nope", "2303.99999"]).json()
+
+    assert body["jobs"] == []
+    assert len(body["errors"]) == 2
+    assert enqueued == []
+
+
+def test_arxiv_failure_returns_502(client, monkeypatch, enqueued):
+    def scrape_arxiv_batch(paper_ids):
+        raise ConnectionError("arXiv is down")
+
+    monkeypatch.setattr(jobs_routes, "scrape_arxiv_batch", scrape_arxiv_batch)
+
+    response = create_batch(client, ["2101.00001"])
+
+    assert response.status_code == 502
+    assert response.json()["code"] == "ARXIV_UNAVAILABLE"
+    assert enqueued == []
+
+
+def make_job(session, **fields) -> Job:
+    job = Job(owner_user_id="u1", source_type=SourceType.url, **fields)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def test_status_batch(client, session):
+    done = make_job(session, status=JobStatus.done, progress=100)
+    queued = make_job(session)
+    deleted = make_job(session, deleted_at=datetime.now(timezone.utc))
+    unknown = uuid.uuid4()
+    job_ids = [str(done.id), str(queued.id), str(deleted.id), str(unknown)]
+
+    response = client.post(
+        "/v1/jobs/status:batch", json={"job_ids": job_ids + [str(done.id)]}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    statuses = {job["id"]: (job["status"], job["progress"]) for job in body["jobs"]}
+    assert statuses == {str(done.id): ("done", 100), str(queued.id): ("queued", 0)}
+    assert body["not_found"] == [str(deleted.id), str(unknown)]
+
+
+def test_status_batch_rejects_malformed_ids(client):
+    response = client.post("/v1/jobs/status:batch", json={"job_ids": ["nope"]})
+
+    assert response.status_code == 422
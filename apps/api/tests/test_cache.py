@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from ..core.cache import ResponseCache
+
+
+class FakeRedis:
+    """The few Redis commands ResponseCache uses, with expiry."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self.get(key) is not None:
+            return None
+        expires_at = time.monotonic() + ex if ex else None
+        self.data[key] = (value, expires_at)
+        return True
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+@pytest.fixture
+def redis_server():
+    return FakeRedis()
+
+
+def make_cache(redis_server, tombstone_ttl=10):
+    cache = ResponseCache("redis://unused", 16, 30, 3600, tombstone_ttl)
+    cache._client = lambda: redis_server
+    return cache
+
+
+def test_set_then_get_from_another_process(redis_server):
+    make_cache(redis_server).set("k", b'{"a":1}')
+
+    cached = make_cache(redis_server).get("k")
+
+    assert cached.body == b'{"a":1}'
+    assert cached.etag.startswith('"')
+
+
+def test_invalidate_blocks_a_late_set(redis_server):
+    cache = make_cache(redis_server)
+    cache.invalidate("k")
+
+    value = cache.set("k", b'{"stale":true}')
+
+    assert value.body == b'{"stale":true}'
+    assert cache.get("k") is None
+    assert make_cache(redis_server).get("k") is None
+
+
+def test_tombstone_from_another_process_blocks_set(redis_server):
+    make_cache(redis_server).invalidate("k")
+
+    make_cache(redis_server).set("k", b'{"stale":true}')
+
+    assert make_cache(redis_server).get("k") is None
+
+
+def test_invalidate_after_set_drops_the_entry(redis_server):
+    cache = make_cache(redis_server)
+    cache.set("k", b'{"a":1}')
+
+    make_cache(redis_server).invalidate("k")
+
+    assert make_cache(redis_server).get("k") is None
+
+
+def test_set_works_again_once_the_tombstone_expires(redis_server):
+    cache = make_cache(redis_server, tombstone_ttl=0.01)
+    cache.invalidate("k")
+    time.sleep(0.02)
+
+    cache.set("k", b'{"a":2}')
+
+    assert make_cache(redis_server).get("k").body == b'{"a":2}'
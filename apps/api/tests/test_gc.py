@@ -0,0 +1,48 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from .. import tasks
+from ..benchmarks.fakes import FakeSupabase
+from ..deps.supabase import set_supabase_client
+from ..models.job_model import Job, SourceType
+
+
+@pytest.fixture
+def bucket(tmp_path, engine, monkeypatch):
+    monkeypatch.setattr(tasks, "engine", engine)
+    set_supabase_client(FakeSupabase(str(tmp_path)))
+    yield tasks.get_supabase_client().storage.from_(tasks.BUCKET_NAME)
+    set_supabase_client(None)
+
+
+def upload(bucket, path: str, age_seconds: float = 24 * 3600) -> str:
+    bucket.upload(path, b"%PDF-1.4")
+    mtime = datetime.now(timezone.utc).timestamp() - age_seconds
+    os.utime(bucket._path(path), (mtime, mtime))
+    return path
+
+
+def add_job(session, source_url: str) -> None:
+    session.add(
+        Job(owner_user_id="u1", source_type=SourceType.pdf, source_url=source_url)
+    )
+    session.commit()
+
+
+def test_only_unreferenced_old_uploads_are_removed(bucket, session):
+    referenced = upload(bucket, "uploads/u1/referenced.pdf")
+    legacy = upload(bucket, "uploads/u1/legacy.pdf")
+    orphan = upload(bucket, "uploads/u1/orphan.pdf")
+    recent = upload(bucket, "uploads/u2/recent.pdf", age_seconds=60)
+    add_job(session, bucket.get_public_url(referenced))
+    # Stored by an older storage3 release, with an empty query string.
+    add_job(session, bucket.get_public_url(legacy) + "?")
+
+    removed = tasks._sweep_orphaned_uploads(datetime.now(timezone.utc))
+
+    assert removed == 1
+    assert not os.path.exists(bucket._path(orphan))
+    for path in (referenced, legacy, recent):
+        assert os.path.exists(bucket._path(path))
@@ -0,0 +1,115 @@
+import json
+from datetime import datetime, timezone
+
+from ..core.cache import job_cache_keys, response_cache
+from ..models.job_model import Job, JobStatus, SourceType
+
+
+def make_job(session, status=JobStatus.done, **fields) -> Job:
+    job = Job(
+        owner_user_id="user-1",
+        source_type=SourceType.pdf,
+        status=status,
+        summary="A summary.",
+        flashcards=json.dumps([{"question": "Q?", "answer": "A."}]),
+        quiz="[]",
+        **fields,
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def test_done_job_is_served_with_etag(client, session):
+    job = make_job(session)
+
+    response = client.get(f"/v1/jobs/{job.id}")
+
+    assert response.status_code == 200
+    assert response.json()["summary"] == "A summary."
+    assert response.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+
+def test_matching_etag_returns_304(client, session):
+    job = make_job(session)
+    etag = client.get(f"/v1/jobs/{job.id}").headers["etag"]
+
+    response = client.get(f"/v1/jobs/{job.id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_stale_etag_returns_body(client, session):
+    job = make_job(session)
+
+    response = client.get(f"/v1/jobs/{job.id}", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+
+
+def test_unfinished_job_is_not_cached(client, session):
+    job = make_job(session, status=JobStatus.processing)
+
+    response = client.get(f"/v1/jobs/{job.id}/status")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    job.status = JobStatus.done
+    session.add(job)
+    session.commit()
+    assert client.get(f"/v1/jobs/{job.id}/status").json()["status"] == "done"
+
+
+def test_uuid_spellings_share_cache_entries(client, session):
+    job = make_job(session)
+    canonical = str(job.id)
+
+    etag = client.get(f"/v1/jobs/{canonical}").headers["etag"]
+    response = client.get(
+        f"/v1/jobs/{canonical.upper().replace('-', '')}",
+        headers={"If-None-Match": etag},
+    )
+
+    assert response.status_code == 304
+
+
+def test_delete_invalidates_every_spelling(client, session, purged):
+    job = make_job(session)
+    upper = str(job.id).upper()
+    assert client.get(f"/v1/jobs/{upper}").status_code == 200
+    assert client.get(f"/v1/jobs/{upper}/status").status_code == 200
+
+    assert client.delete(f"/v1/jobs/{job.id.hex}").status_code == 204
+
+    assert client.get(f"/v1/jobs/{upper}").status_code == 404
+    assert client.get(f"/v1/jobs/{upper}/status").status_code == 404
+    assert purged == [str(job.id)]
+
+
+def test_malformed_job_id_is_rejected(client):
+    assert client.get("/v1/jobs/not-a-uuid").status_code == 422
+
+
+def test_delete_during_cache_fill_is_not_cached(client, session, monkeypatch):
+    job = make_job(session)
+    original_set = response_cache.set
+
+    def set_after_delete(key, body):
+        # DELETE commits and invalidates after this request loaded the row.
+        job.deleted_at = datetime.now(timezone.utc)
+        session.add(job)
+        session.commit()
+        response_cache.invalidate(*job_cache_keys(job.id))
+        return original_set(key, body)
+
+    monkeypatch.setattr(response_cache, "set", set_after_delete)
+    assert client.get(f"/v1/jobs/{job.id}").status_code == 200
+    monkeypatch.setattr(response_cache, "set", original_set)
+
+    assert client.get(f"/v1/jobs/{job.id}").status_code == 404
+    assert client.get(f"/v1/jobs/{job.id}/status").status_code == 404
@@ -1,5 +1,14 @@
-import arxiv
 import re
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    import arxiv
+
+# arXiv returns at most `page_size` results per API request; one chunk of ids
+# maps to exactly one request.
+ARXIV_BATCH_SIZE = 100
+
+_BARE_ID_RE = re.compile(r"^(\d{4}\.\d{4,5})(?:v\d+)?$")
 
 
 def extract_arxiv_id(url: str) -> str | None:
@@ -11,23 +20,61 @@ def extract_arxiv_id(url: str) -> str | None:
     return None
 
 
+def parse_arxiv_ref(value: str) -> str | None:
+    """Extracts the arXiv ID from a URL or a bare id like 2101.00001v2."""
+    match = _BARE_ID_RE.match(value.strip())
+    if match:
+        return match.group(1)
+    return extract_arxiv_id(value)
+
+
+def _paper_data(paper: "arxiv.Result", paper_id: str) -> dict:
+    return {
+        "title": paper.title,
+        "abstract": paper.summary,
+        "authors": [a.name for a in paper.authors],
+        "published_at": paper.published,
+        "pdf_url": paper.pdf_url,
+        "arxiv_id": paper_id,
+    }
+
+
 def scrape_arxiv_data(url: str):
     paper_id = extract_arxiv_id(url)
     if not paper_id:
         raise ValueError("Invalid arXiv URL")
 
+    # The arxiv client is imported on first use to keep API startup light.
+    import arxiv
+
     client = arxiv.Client()
     search = arxiv.Search(id_list=[paper_id])
 
     try:
         paper = next(client.results(search))
-        return {
-            "title": paper.title,
-            "abstract": paper.summary,
-            "authors": [a.name for a in paper.authors],
-            "published_at": paper.published,
-            "pdf_url": paper.pdf_url,
-            "arxiv_id": paper_id,
-        }
+        return _paper_data(paper, paper_id)
     except StopIteration:
         raise ValueError("Paper not found on arXiv")
+
+
+def scrape_arxiv_batch(paper_ids: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+    """Look up many arXiv ids with one `id_list` query per ARXIV_BATCH_SIZE ids.
+
+    Returns (metadata keyed by id, ids that arXiv did not return).
+    """
+    import arxiv
+
+    unique_ids = list(dict.fromkeys(paper_ids))
+    client = arxiv.Client(page_size=ARXIV_BATCH_SIZE)
+    found: Dict[str, dict] = {}
+
+    for start in range(0, len(unique_ids), ARXIV_BATCH_SIZE):
+        chunk = unique_ids[start : start + ARXIV_BATCH_SIZE]
+        search = arxiv.Search(id_list=chunk, max_results=len(chunk))
+        for paper in client.results(search):
+            paper_id = parse_arxiv_ref(paper.get_short_id())
+            if paper_id:
+                found[paper_id] = _paper_data(paper, paper_id)
+
+    missing = [paper_id for paper_id in unique_ids if paper_id not in found]
+    return found, missing
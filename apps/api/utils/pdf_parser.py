@@ -1,30 +1,47 @@
 # apps/api/utils/pdf_parser.py
 import io
 import re
+import time
 from typing import Any, Dict, List
 
-from pypdf import PdfReader, PdfWriter
+from ..core.metrics import PDF_PAGES, PDF_PROCESSING_SECONDS
+from ..core.tracing import stage_span
+
+
+def _observe_pages(operation: str, pages: int, started: float) -> None:
+    PDF_PAGES.labels(operation).inc(pages)
+    PDF_PROCESSING_SECONDS.labels(operation).inc(time.perf_counter() - started)
 
 
 def compress_pdf(file_bytes: bytes) -> bytes:
     """
     Compresses PDF content streams (lossless) to reduce file size.
     """
+    # pypdf is imported on first use to keep API startup light.
+    from pypdf import PdfReader, PdfWriter
+
+    started = time.perf_counter()
     try:
-        reader = PdfReader(io.BytesIO(file_bytes))
-        writer = PdfWriter()
+        with stage_span("pdf.compress", **{"pdf.input_bytes": len(file_bytes)}) as span:
+            reader = PdfReader(io.BytesIO(file_bytes))
+            writer = PdfWriter()
 
-        for page in reader.pages:
-            # 1. Compress content streams (text/vector data)
-            page.compress_content_streams()
-            writer.add_page(page)
+            for page in reader.pages:
+                # 1. Compress content streams (text/vector data). Recent pypdf
+                # only allows this on pages that belong to a writer.
+                writer.add_page(page).compress_content_streams()
 
-        # 2. Reduce metadata overhead
-        writer.add_metadata(reader.metadata)
+            # 2. Reduce metadata overhead
+            if reader.metadata:
+                writer.add_metadata(reader.metadata)
 
-        output_stream = io.BytesIO()
-        writer.write(output_stream)
-        return output_stream.getvalue()
+            output_stream = io.BytesIO()
+            writer.write(output_stream)
+            output = output_stream.getvalue()
+            span.set_attribute("pdf.pages", len(reader.pages))
+            span.set_attribute("pdf.output_bytes", len(output))
+            _observe_pages("compress", len(reader.pages), started)
+            return output
     except Exception as e:
         # If compression fails, return original bytes to avoid breaking the pipeline
         print(f"Warning: PDF compression failed, using original file. Error: {e}")
@@ -44,14 +61,23 @@ def clean_text(text: str) -> str:
 
 
 def extract_sections_from_pdf(file_content: bytes) -> List[Dict[str, Any]]:
-    reader = PdfReader(io.BytesIO(file_content))
-    sections = []
+    from pypdf import PdfReader
+
+    started = time.perf_counter()
+    with stage_span("pdf.extract_text") as span:
+        reader = PdfReader(io.BytesIO(file_content))
+        sections = []
 
-    # On boucle sur les pages
-    for i, page in enumerate(reader.pages):
-        text = clean_text(page.extract_text())
-        if text:
-            # On crée une section pour chaque page
-            sections.append({"title": f"Page {i + 1}", "content": text, "order": i + 1})
+        # On boucle sur les pages
+        for i, page in enumerate(reader.pages):
+            text = clean_text(page.extract_text())
+            if text:
+                # On crée une section pour chaque page
+                sections.append(
+                    {"title": f"Page {i + 1}", "content": text, "order": i + 1}
+                )
 
+        span.set_attribute("pdf.pages", len(reader.pages))
+        span.set_attribute("pdf.sections", len(sections))
+    _observe_pages("extract", len(reader.pages), started)
     return sections
@@ -1,11 +1,34 @@
+"""Postgres-backed job runner, an alternative to Celery + Redis.
+
+Start it with `python -m apps.api.worker` and set JOB_BACKEND=db on the API.
+Jobs are claimed with `SELECT ... FOR UPDATE SKIP LOCKED`, so any number of
+worker processes can share one database. Idle workers block on LISTEN and are
+woken by the API's NOTIFY, with WORKER_POLL_INTERVAL as a fallback poll.
+
+A claimed job holds a lease (`job.locked_by` / `job.lease_expires_at`) that
+is renewed while it runs. If a worker dies, its jobs are reclaimed once the
+lease expires, up to WORKER_MAX_ATTEMPTS times.
+"""
+
 import logging
 import os
+import select
+import signal
+import socket
+import threading
 import time
+import uuid
+from datetime import timedelta
 
+from prometheus_client import start_http_server
 from sqlalchemy import text
-from sqlmodel import Session
 
-from .deps.db import engine
+from .core.celery_app import SWEEP_INTERVAL_SECONDS
+from .core.job_queue import NOTIFY_CHANNEL, NOTIFY_PURGE
+from .core.metrics import WORKER_METRICS_PORT, build_registry
+from .core.tracing import configure_tracing
+from .deps.db import DB_MAX_OVERFLOW, DB_POOL_SIZE, engine
+from .tasks import mark_job_error, purge_job_task, run_pipeline, sweep_jobs
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,18 +36,291 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Jobs run at once by this process, and section summaries in flight per job.
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+WORKER_SECTION_CONCURRENCY = int(os.getenv("WORKER_SECTION_CONCURRENCY", "4"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "30"))
+# A lease is renewed every third of its length while the job runs.
+WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "300"))
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+PURGE_BATCH = 100
+# How often listen() checks for SIGTERM while waiting for a NOTIFY.
+_STOP_CHECK_SECONDS = 1.0
 
-def main():
-    logger.info("Worker started. Waiting for jobs (placeholder worker).")
-    poll_seconds = int(os.getenv("WORKER_POLL_INTERVAL", "30"))
-    while True:
+_CLAIM_TEMPLATE = """
+    UPDATE job
+    SET status = 'processing', locked_by = :worker_id,
+        lease_expires_at = now() + :lease, attempts = attempts + 1,
+        updated_at = now()
+    WHERE id = (
+        SELECT id FROM job
+        WHERE {condition}
+        ORDER BY {order}
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, attempts
+    """
+# Claimed in this order, each probe walking its own partial index (an OR of
+# the two conditions could use neither). FOR UPDATE rules out a UNION ALL.
+_CLAIM_SQL = [
+    # Oldest queued job: ix_job_claimable.
+    text(
+        _CLAIM_TEMPLATE.format(
+            condition="status = 'queued' AND deleted_at IS NULL",
+            order="created_at",
+        )
+    ),
+    # A processing job whose lease ran out: ix_job_lease_expiry. Jobs run by
+    # Celery never get a lease, so they are never picked up here.
+    text(
+        _CLAIM_TEMPLATE.format(
+            condition=(
+                "status = 'processing' AND lease_expires_at < now() "
+                "AND deleted_at IS NULL"
+            ),
+            order="lease_expires_at",
+        )
+    ),
+]
+_RENEW_SQL = text(
+    "UPDATE job SET lease_expires_at = now() + :lease "
+    "WHERE id = ANY(CAST(:job_ids AS uuid[])) AND locked_by = :worker_id"
+)
+_RELEASE_SQL = text(
+    "UPDATE job SET locked_by = NULL, lease_expires_at = NULL "
+    "WHERE id = :job_id AND locked_by = :worker_id"
+)
+_DELETED_SQL = text(
+    "SELECT id FROM job WHERE deleted_at IS NOT NULL ORDER BY deleted_at LIMIT :limit"
+)
+
+
+class JobRunner:
+    """Runs up to `concurrency` jobs at once in threads of this process."""
+
+    def __init__(
+        self,
+        concurrency: int = WORKER_CONCURRENCY,
+        section_concurrency: int = WORKER_SECTION_CONCURRENCY,
+        lease_seconds: float = WORKER_LEASE_SECONDS,
+        poll_interval: float = WORKER_POLL_INTERVAL,
+        max_attempts: int = WORKER_MAX_ATTEMPTS,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+    ):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency
+        self.section_concurrency = section_concurrency
+        self.lease = timedelta(seconds=lease_seconds)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self.stopping = threading.Event()
+        # Set by the SIGTERM handler; listen() turns it into a stop().
+        self.stop_signalled = False
+        self._wakeup = threading.Condition()
+        self._generation = 0
+        self._purge_requested = threading.Event()
+        self._active: set[str] = set()
+        self._active_lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    # -- claiming ---------------------------------------------------------
+
+    def claim(self):
+        """Claim one job; returns (job_id, attempts) or None if nothing is ready."""
+        params = {"worker_id": self.worker_id, "lease": self.lease}
+        row = None
+        with engine.begin() as conn:
+            for statement in _CLAIM_SQL:
+                row = conn.execute(statement, params).first()
+                if row:
+                    break
+        if row:
+            with self._active_lock:
+                self._active.add(str(row.id))
+        return row
+
+    def release(self, job_id: str) -> None:
+        with self._active_lock:
+            self._active.discard(job_id)
+        with engine.begin() as conn:
+            conn.execute(_RELEASE_SQL, {"job_id": job_id, "worker_id": self.worker_id})
+
+    def run_one(self) -> bool:
+        """Claim and run a single job. Returns False when the queue was empty."""
+        claimed = self.claim()
+        if not claimed:
+            return False
+        job_id = str(claimed.id)
         try:
-            with Session(engine) as session:
-                session.exec(text("SELECT 1"))
-            logger.debug("Worker DB heartbeat succeeded.")
-        except Exception as exc:  # pragma: no cover - log-only path
-            logger.error("Worker DB heartbeat failed: %s", exc)
-        time.sleep(poll_seconds)
+            if claimed.attempts > self.max_attempts:
+                logger.error(f"Job {job_id} exceeded {self.max_attempts} attempts")
+                mark_job_error(
+                    job_id, f"Job failed after {self.max_attempts} attempts."
+                )
+            else:
+                run_pipeline(job_id, section_concurrency=self.section_concurrency)
+        except Exception as e:
+            logger.exception(f"❌ Job {job_id} crashed the worker pipeline")
+            mark_job_error(job_id, str(e))
+        finally:
+            self.release(job_id)
+        return True
+
+    # -- threads ----------------------------------------------------------
+
+    def _wake_all(self) -> None:
+        with self._wakeup:
+            self._generation += 1
+            self._wakeup.notify_all()
+
+    def _job_loop(self) -> None:
+        while not self.stopping.is_set():
+            with self._wakeup:
+                generation = self._generation
+            try:
+                if self.run_one():
+                    continue
+            except Exception as exc:
+                logger.error(f"Claiming a job failed: {exc}")
+            # Nothing claimable: sleep until a NOTIFY or the fallback poll,
+            # unless one arrived while we were querying.
+            with self._wakeup:
+                if generation == self._generation and not self.stopping.is_set():
+                    self._wakeup.wait(self.poll_interval)
+
+    def _lease_loop(self) -> None:
+        interval = self.lease.total_seconds() / 3
+        while not self.stopping.wait(interval):
+            with self._active_lock:
+                job_ids = list(self._active)
+            if not job_ids:
+                continue
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        _RENEW_SQL,
+                        {
+                            "job_ids": job_ids,
+                            "worker_id": self.worker_id,
+                            "lease": self.lease,
+                        },
+                    )
+            except Exception as exc:
+                logger.error(f"Lease renewal failed: {exc}")
+
+    def _maintenance_loop(self) -> None:
+        """Purge soft-deleted jobs on request and run the GC sweep periodically."""
+        next_sweep = time.monotonic()
+        while not self.stopping.is_set():
+            try:
+                if time.monotonic() >= next_sweep:
+                    for job_id in sweep_jobs():
+                        purge_job_task.run(job_id)
+                    next_sweep = time.monotonic() + self.sweep_interval
+                if self._purge_requested.is_set():
+                    self._purge_requested.clear()
+                    with engine.connect() as conn:
+                        job_ids = conn.execute(
+                            _DELETED_SQL, {"limit": PURGE_BATCH}
+                        ).scalars()
+                        job_ids = [str(job_id) for job_id in job_ids]
+                    for job_id in job_ids:
+                        purge_job_task.run(job_id)
+                    if len(job_ids) == PURGE_BATCH:
+                        self._purge_requested.set()
+            except Exception as exc:
+                logger.error(f"Worker maintenance failed: {exc}")
+            timeout = max(0.0, next_sweep - time.monotonic())
+            self._purge_requested.wait(min(timeout, self.poll_interval))
+
+    def _stop_requested(self) -> bool:
+        return self.stop_signalled or self.stopping.is_set()
+
+    def listen(self) -> None:
+        """Block on LISTEN and wake job threads on every NOTIFY (or poll timeout).
+
+        Returns once a stop is requested; the caller then runs stop().
+        """
+        while not self._stop_requested():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                logger.info(f"Listening on channel {NOTIFY_CHANNEL}")
+                # Jobs may have been queued while we were not listening.
+                self._wake_all()
+                self._purge_requested.set()
+                next_poll = time.monotonic() + self.poll_interval
+                while not self._stop_requested():
+                    ready, _, _ = select.select(
+                        [conn], [], [], min(_STOP_CHECK_SECONDS, self.poll_interval)
+                    )
+                    if ready:
+                        conn.poll()
+                        payloads = {n.payload for n in conn.notifies}
+                        conn.notifies.clear()
+                        if NOTIFY_PURGE in payloads:
+                            self._purge_requested.set()
+                    elif time.monotonic() < next_poll:
+                        continue
+                    next_poll = time.monotonic() + self.poll_interval
+                    self._wake_all()
+            except Exception as exc:
+                logger.error(f"LISTEN connection lost, reconnecting: {exc}")
+                time.sleep(1)
+            finally:
+                if raw is not None:
+                    # Never hand a LISTENing connection back to the pool.
+                    raw.invalidate()
+
+    def start(self) -> None:
+        needed = self.concurrency * self.section_concurrency + 3
+        if DB_POOL_SIZE + DB_MAX_OVERFLOW < needed:
+            logger.warning(
+                f"DB pool allows {DB_POOL_SIZE + DB_MAX_OVERFLOW} connections but "
+                f"this worker may use {needed}; raise DB_POOL_SIZE"
+            )
+        targets = [self._job_loop] * self.concurrency
+        targets += [self._lease_loop, self._maintenance_loop]
+        for target in targets:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(
+            f"Worker {self.worker_id} started: {self.concurrency} job threads, "
+            f"{self.section_concurrency} sections per job"
+        )
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop claiming and wait for running jobs to finish."""
+        self.stopping.set()
+        self._purge_requested.set()
+        self._wake_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+def main():
+    configure_tracing("paperpilot-worker")
+    start_http_server(WORKER_METRICS_PORT, registry=build_registry())
+    runner = JobRunner()
+    # `docker stop` sends SIGTERM: stop claiming and let running jobs finish.
+    # The handler only sets a flag: it runs on the main thread, which may be
+    # holding one of the locks behind the runner's events and condition.
+    signal.signal(signal.SIGTERM, lambda *_: setattr(runner, "stop_signalled", True))
+    runner.start()
+    try:
+        runner.listen()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info("Stopping worker, waiting for running jobs...")
+        runner.stop()
 
 
 if __name__ == "__main__":